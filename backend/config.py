@@ -50,6 +50,7 @@ MODEL_CACHE_DIR = os.getenv('MODEL_CACHE_DIR', os.path.join(os.path.expanduser("
 CACHE_MAX_SIZE_MB = int(os.getenv('CACHE_MAX_SIZE_MB', '5000'))  # 5GB default
 CACHE_AUDIO_TTL_HOURS = int(os.getenv('CACHE_AUDIO_TTL_HOURS', '24'))  # 24 hours default
 CACHE_CLEANUP_INTERVAL_MINUTES = int(os.getenv('CACHE_CLEANUP_INTERVAL_MINUTES', '30'))  # 30 min default
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '10000'))  # Cached subtitle lines (0 disables)
 
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
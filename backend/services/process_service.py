@@ -5,7 +5,7 @@ import queue
 import logging
 import time
 import hashlib
-from typing import Generator, Dict, Any, List, Optional
+from typing import Generator, Dict, Any, List, Optional, Tuple
 
 from backend.config import CACHE_DIR, ENABLE_WHISPER, SERVER_API_KEY
 
@@ -64,6 +64,7 @@ def _cleanup_inflight_request(key: str):
     with _inflight_lock:
         _inflight_requests.pop(key, None)
         _inflight_results.pop(key, None)
+
 from backend.utils.file_utils import get_cache_path, validate_audio_file
 from backend.utils.logging_utils import LogContext, generate_request_id
 from backend.services.youtube_service import await_download_subtitles, get_video_title, ensure_audio_downloaded
@@ -80,6 +81,55 @@ import yt_dlp
 
 logger = logging.getLogger('subtide')
 
+# =============================================================================
+# SSE Subtitle Batch Coalescing
+# Merges subtitle batches that queued up while the client was being written to,
+# so bursty translation completions produce one SSE write instead of many.
+# =============================================================================
+
+SSE_MAX_COALESCED_BATCHES = 8
+
+
+def _coalesce_subtitle_batches(data: Dict[str, Any], progress_queue: queue.SimpleQueue,
+                               max_batches: int = SSE_MAX_COALESCED_BATCHES) -> Tuple[Dict[str, Any], List[tuple]]:
+    """
+    Merge subtitle batches already waiting in the queue into a single event.
+
+    Never blocks: only messages that are already queued are drained. The
+    'translating' progress events interleaved between batches are absorbed and
+    only the latest one is kept. Draining stops at any other message, and at
+    batch 1, which must reach the client on its own even when it finished
+    after later batches.
+
+    Returns:
+        Tuple of (merged_data, pending_messages) where pending_messages must be
+        emitted next, in order, before reading from the queue again
+    """
+    merged = data
+    merged_count = 1
+    latest_progress = None
+    while merged_count < max_batches:
+        try:
+            msg = progress_queue.get_nowait()
+        except queue.Empty:
+            break
+        msg_type, next_data = msg
+        if msg_type == 'progress' and next_data.get('stage') == 'translating':
+            latest_progress = msg
+            continue
+        if (msg_type != 'progress' or next_data.get('stage') != 'subtitles'
+                or (next_data.get('batchInfo') or {}).get('current') == 1):
+            pending = [latest_progress] if latest_progress else []
+            pending.append(msg)
+            return merged, pending
+        if merged is data:
+            merged = dict(data, subtitles=list(data.get('subtitles', [])))
+        merged['subtitles'].extend(next_data.get('subtitles', []))
+        merged['message'] = next_data.get('message', merged.get('message'))
+        merged['batchInfo'] = next_data.get('batchInfo', merged.get('batchInfo'))
+        merged_count += 1
+    return merged, [latest_progress] if latest_progress else []
+
 def estimate_whisper_time(duration_seconds: float) -> float:
     """
     Estimate Whisper transcription time based on video duration.
@@ -219,7 +269,7 @@ def process_video_logic(video_id: str, target_lang: str, force_whisper: bool, us
 
     def generate():
         # Queue for progress messages
-        progress_queue = queue.Queue()
+        progress_queue = queue.SimpleQueue()
 
         def send_sse(stage, message, percent=None, step=None, total_steps=None, eta=None, batch_info=None):
             data = {'stage': stage, 'message': message}
@@ -564,7 +614,7 @@ def stream_video_logic(video_id: str, target_lang: str, force_whisper: bool, vid
                 # Fall through to process normally
 
     def generate():
-        progress_queue = queue.Queue()
+        progress_queue = queue.SimpleQueue()
 
         def send_sse(stage, message, percent=None, step=None, total_steps=None, eta=None, batch_info=None):
             data = {'stage': stage, 'message': message}
@@ -918,11 +968,20 @@ def stream_video_logic(video_id: str, target_lang: str, force_whisper: bool, vid
         worker = threading.Thread(target=do_work, daemon=True)
         worker.start()
 
+        pending = []
         while True:
             try:
-                msg_type, data = progress_queue.get(timeout=60)
+                if pending:
+                    msg_type, data = pending.pop(0)
+                else:
+                    msg_type, data = progress_queue.get(timeout=60)
 
                 if msg_type == 'progress':
+                    # Batch 1 is sent alone: the client starts playback sync on it.
+                    # Only drain the queue once pending messages are flushed, to keep order.
+                    if (not pending and data.get('stage') == 'subtitles'
+                            and data.get('batchInfo', {}).get('current') != 1):
+                        data, pending = _coalesce_subtitle_batches(data, progress_queue)
                     yield f"data: {json.dumps(data)}\n\n"
                 elif msg_type == 'result':
                     yield f"data: {json.dumps({'result': data})}\n\n"
@@ -7,9 +7,12 @@ Supports multiple TTS backends:
 """
 
 import os
+import time
 import hashlib
 import logging
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Optional, Dict, List, Tuple
 
 from backend.config import CACHE_DIR
@@ -20,6 +23,18 @@ logger = logging.getLogger('subtide')
 TTS_CACHE_DIR = os.path.join(CACHE_DIR, 'tts')
 os.makedirs(TTS_CACHE_DIR, exist_ok=True)
 
+# Parallel unlinks when clearing large caches
+CLEAR_CACHE_WORKERS = 16
+
+# Upper bound for a single edge-tts request before falling back
+EDGE_TTS_TIMEOUT_SECONDS = 30
+
+# edge-tts voice list refresh interval (the list changes rarely)
+VOICE_LIST_TTL_SECONDS = 3600
+
+# Windows opens raw fds in text mode unless O_BINARY is passed
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+
 # TTS Configuration
 TTS_ENABLED = os.getenv('TTS_ENABLED', 'true').lower() == 'true'
 TTS_BACKEND = os.getenv('TTS_BACKEND', 'edge-tts')  # edge-tts or gtts
@@ -48,11 +63,25 @@ DEFAULT_VOICES = {
 }
 
 
+_FALLBACK_VOICE = DEFAULT_VOICES['en']
+
+
+def _resolve_voice(lang: str, voice_id: Optional[str] = None) -> str:
+    """Pick the voice for a request: explicit id, exact language, base language, then English."""
+    if voice_id:
+        return voice_id
+    voice = DEFAULT_VOICES.get(lang)
+    if voice is None:
+        voice = DEFAULT_VOICES.get(lang.split('-')[0], _FALLBACK_VOICE)
+    return voice
+
+
 def get_cache_key(text: str, lang: str, voice_id: Optional[str] = None) -> str:
     """Generate a cache key for TTS audio."""
-    voice = voice_id or DEFAULT_VOICES.get(lang, DEFAULT_VOICES.get('en'))
+    voice = _resolve_voice(lang, voice_id)
     content = f"{text}:{lang}:{voice}"
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    # 8-byte BLAKE2b digest -> 16 hex chars, without hashing 32 bytes and truncating
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
 
 
 def get_cache_path(cache_key: str) -> str:
@@ -72,10 +101,12 @@ def get_cached_audio(text: str, lang: str, voice_id: Optional[str] = None) -> Op
     cache_key = get_cache_key(text, lang, voice_id)
     cache_path = get_cache_path(cache_key)
 
-    if os.path.exists(cache_path):
+    # Open directly instead of exists()+open(): one lookup, and no race with cache cleanup
+    try:
         with open(cache_path, 'rb') as f:
             return f.read()
-    return None
+    except FileNotFoundError:
+        return None
 
 
 def _cache_audio(audio_bytes: bytes, text: str, lang: str, voice_id: Optional[str] = None) -> str:
@@ -83,12 +114,43 @@ def _cache_audio(audio_bytes: bytes, text: str, lang: str, voice_id: Optional[st
     cache_key = get_cache_key(text, lang, voice_id)
     cache_path = get_cache_path(cache_key)
 
-    with open(cache_path, 'wb') as f:
-        f.write(audio_bytes)
+    # Audio is written once in full, so skip the BufferedWriter layer and write the raw fd
+    fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        view = memoryview(audio_bytes)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
     return cache_path
 
 
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='tts-event-loop', daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def _run_async(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the shared loop from sync code and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_event_loop())
+    try:
+        return future.result(timeout=timeout or EDGE_TTS_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+
 async def _generate_edge_tts(text: str, voice: str) -> bytes:
     """Generate TTS audio using edge-tts."""
     import edge_tts
@@ -151,7 +213,7 @@ def generate_tts(
             return cached, 'audio/mpeg'
 
     # Get voice for this language
-    voice = voice_id or DEFAULT_VOICES.get(lang) or DEFAULT_VOICES.get(lang.split('-')[0]) or DEFAULT_VOICES['en']
+    voice = _resolve_voice(lang, voice_id)
 
     logger.info(f"[TTS] Generating audio: lang={lang}, voice={voice}, text={text[:50]}...")
 
@@ -160,13 +222,8 @@ def generate_tts(
     # Try edge-tts first (primary backend)
     if TTS_BACKEND == 'edge-tts':
         try:
-            # Run async edge-tts in sync context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                audio_bytes = loop.run_until_complete(_generate_edge_tts(text, voice))
-            finally:
-                loop.close()
+            # One long-lived loop serves every request instead of a new loop per call
+            audio_bytes = _run_async(_generate_edge_tts(text, voice))
 
             logger.debug(f"[TTS] edge-tts generated {len(audio_bytes)} bytes")
         except Exception as e:
@@ -188,6 +245,24 @@ def generate_tts(
     return audio_bytes, 'audio/mpeg'
 
 
+_voice_manifest: Optional[List[Dict]] = None
+_voice_manifest_fetched_at = 0.0
+_voice_manifest_lock = threading.Lock()
+
+
+def _get_voice_manifest() -> List[Dict]:
+    """Full edge-tts voice list, fetched once per VOICE_LIST_TTL_SECONDS and shared by all languages."""
+    global _voice_manifest, _voice_manifest_fetched_at
+    with _voice_manifest_lock:
+        now = time.monotonic()
+        if _voice_manifest is None or now - _voice_manifest_fetched_at > VOICE_LIST_TTL_SECONDS:
+            import edge_tts
+
+            _voice_manifest = _run_async(edge_tts.list_voices())
+            _voice_manifest_fetched_at = now
+        return _voice_manifest
+
+
 def get_available_voices(lang: Optional[str] = None) -> List[Dict]:
     """
     Get available TTS voices.
@@ -203,15 +278,7 @@ def get_available_voices(lang: Optional[str] = None) -> List[Dict]:
         return [{'id': 'default', 'name': 'Default', 'lang': lang or 'en'}]
 
     try:
-        import edge_tts
-
-        # Run async voices list in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            voices = loop.run_until_complete(edge_tts.list_voices())
-        finally:
-            loop.close()
+        voices = _get_voice_manifest()
 
         result = []
         for voice in voices:
@@ -239,7 +306,7 @@ def get_available_voices(lang: Optional[str] = None) -> List[Dict]:
         logger.warning(f"[TTS] Failed to list voices: {e}")
         # Return default voices as fallback
         if lang:
-            default_voice = DEFAULT_VOICES.get(lang, DEFAULT_VOICES.get('en'))
+            default_voice = _resolve_voice(lang)
             return [{'id': default_voice, 'name': default_voice, 'lang': lang}]
         return [{'id': v, 'name': v, 'lang': k} for k, v in DEFAULT_VOICES.items()]
 
@@ -254,14 +321,22 @@ def get_tts_status() -> Dict:
     }
 
 
+def _remove_cached_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
 def clear_tts_cache() -> int:
     """Clear the TTS cache. Returns number of files deleted."""
-    count = 0
-    for filename in os.listdir(TTS_CACHE_DIR):
-        if filename.endswith('.mp3'):
-            try:
-                os.remove(os.path.join(TTS_CACHE_DIR, filename))
-                count += 1
-            except OSError:
-                pass
-    return count
+    # scandir's DirEntry carries the file type, so filtering needs no extra stat per file
+    with os.scandir(TTS_CACHE_DIR) as entries:
+        paths = [e.path for e in entries if e.name.endswith('.mp3') and e.is_file()]
+    if not paths:
+        return 0
+
+    # Unlinks are syscall-latency bound; overlap them across a few threads
+    with ThreadPoolExecutor(max_workers=min(CLEAR_CACHE_WORKERS, len(paths))) as executor:
+        return sum(executor.map(_remove_cached_file, paths))
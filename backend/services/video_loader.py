@@ -1,7 +1,8 @@
 import logging
 import os
-import re
 import hashlib
+import string
+from functools import lru_cache
 from urllib.parse import urlparse
 import yt_dlp
 from typing import Optional, Dict, Any
@@ -17,9 +18,9 @@ LOG_PREFIX = "[VIDEO_LOADER]"
 MIN_VALID_AUDIO_SIZE_BYTES = 1000
 
 # Reserved filenames on Windows (for cross-platform safety)
-RESERVED_NAMES = {'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4',
-                  'COM5', 'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2',
-                  'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'}
+RESERVED_NAMES = frozenset({'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4',
+                            'COM5', 'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2',
+                            'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'})
 
 # SECURITY: Whitelist of allowed domains to prevent SSRF attacks
 # Only allow URLs from known video hosting platforms
@@ -83,6 +84,16 @@ def is_allowed_url(url: str) -> bool:
     except Exception:
         return False
 
+# Exact ASCII allow-list: a trailing newline or non-ASCII alphanumeric cannot slip into a filename.
+# frozenset.issuperset(str) checks every character in one C-level pass.
+_SAFE_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+
+
+def _hash_id(value: str) -> str:
+    """32-char hex filename token (16-byte BLAKE2b; available even where FIPS builds block MD5)."""
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
+
+
 def sanitize_id(raw_id: str) -> str:
     """
     Sanitize a video ID or create a hash if it contains unsafe characters.
@@ -91,21 +102,51 @@ def sanitize_id(raw_id: str) -> str:
         raise ValueError("Video ID cannot be empty")
         
     # Check if safe
-    if re.match(r'^[a-zA-Z0-9_-]+$', raw_id) and 1 <= len(raw_id) <= 64 and raw_id.upper() not in RESERVED_NAMES:
+    if len(raw_id) <= 64 and _SAFE_ID_CHARS.issuperset(raw_id) and raw_id.upper() not in RESERVED_NAMES:
         return raw_id
         
     # Otherwise hash it
-    return hashlib.md5(raw_id.encode('utf-8')).hexdigest()
+    return _hash_id(raw_id)
+
+@lru_cache(maxsize=1)
+def _extractors() -> tuple:
+    """yt-dlp extractor instances, built once (gen_extractors() instantiates ~1700 of them)."""
+    return tuple(yt_dlp.extractor.gen_extractors())
+
+
+# Common hosts mapped to the IE_NAME of their dedicated extractor, which is tried before
+# scanning every extractor (YoutubeIE sits near the end of gen_extractors())
+_HOST_EXTRACTORS = {
+    'youtube.com': 'youtube',
+    'm.youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'youtube-nocookie.com': 'youtube',
+    'vimeo.com': 'vimeo',
+    'dailymotion.com': 'dailymotion',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+}
+
+@lru_cache(maxsize=1)
+def _extractors_by_name() -> Dict[str, Any]:
+    by_name: Dict[str, Any] = {}
+    for extractor in _extractors():
+        by_name.setdefault(extractor.IE_NAME, extractor)
+    return by_name
 
 def is_supported_site(url: str) -> bool:
     """
     Check if the URL is supported by a specific yt-dlp extractor (not generic).
     """
     try:
-        extractors = yt_dlp.extractor.gen_extractors()
-        for extractor in extractors:
-            if extractor.IE_NAME != 'generic' and extractor.suitable(url):
-                return True
+        host = (urlparse(url).hostname or '').removeprefix('www.')
+        preferred = _extractors_by_name().get(_HOST_EXTRACTORS.get(host))
+        if preferred is not None and preferred.suitable(url):
+            return True
+        return any(
+            extractor.IE_NAME != 'generic' and extractor.suitable(url)
+            for extractor in _extractors()
+        )
     except Exception as e:
         logger.warning(f"Error checking supported site: {e}")
     return False
@@ -146,6 +187,13 @@ def get_video_info(url: str) -> Dict[str, Any]:
         logger.error(f"Failed to extract info for {url}: {e}")
         return {}
 
+def _file_size(path: str) -> Optional[int]:
+    """Size of a file in bytes, or None if it does not exist (one stat instead of exists+getsize)."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
 def download_audio(url: str, custom_id: Optional[str] = None) -> Optional[str]:
     """
     Download audio from any URL supported by yt-dlp.
@@ -176,7 +224,7 @@ def download_audio(url: str, custom_id: Optional[str] = None) -> Optional[str]:
                 vid_id = sanitize_id(info['id'])
             else:
                 # Fallback to hash of URL
-                vid_id = hashlib.md5(url.encode('utf-8')).hexdigest()
+                vid_id = _hash_id(url)
         
         # Check cache
         audio_cache_dir = os.path.join(CACHE_DIR, "audio")
@@ -186,7 +234,8 @@ def download_audio(url: str, custom_id: Optional[str] = None) -> Optional[str]:
         possible_exts = ['m4a', 'mp3', 'wav', 'webm', 'opus', 'ogg', 'aac']
         for ext in possible_exts:
             p = os.path.join(audio_cache_dir, f"{vid_id}.{ext}")
-            if os.path.exists(p) and os.path.getsize(p) > MIN_VALID_AUDIO_SIZE_BYTES:
+            size = _file_size(p)
+            if size is not None and size > MIN_VALID_AUDIO_SIZE_BYTES:
                 logger.info(f"{LOG_PREFIX} Using cached audio: {p}")
                 return p
 
@@ -194,7 +243,9 @@ def download_audio(url: str, custom_id: Optional[str] = None) -> Optional[str]:
         logger.info(f"{LOG_PREFIX} Downloading audio for {url} (ID: {vid_id})...")
         
         ydl_opts = {
-            'format': 'bestaudio/best',
+            # Prefer an AAC/m4a source: FFmpegExtractAudio then stream-copies it into the
+            # m4a container instead of decoding and re-encoding the whole track
+            'format': 'bestaudio[ext=m4a]/bestaudio/best',
             'outtmpl': os.path.join(audio_cache_dir, f"{vid_id}.%(ext)s"),
             'quiet': False,
             'no_warnings': False,
@@ -229,10 +280,12 @@ def download_audio(url: str, custom_id: Optional[str] = None) -> Optional[str]:
                     if os.path.exists(filepath):
                          return filepath
                 
-                # Fallback scan
-                for f in os.listdir(audio_cache_dir):
-                    if f.startswith(vid_id):
-                        return os.path.join(audio_cache_dir, f)
+                # Fallback scan; DirEntry carries the file type, so only name matches are stat'ed
+                with os.scandir(audio_cache_dir) as entries:
+                    for entry in entries:
+                        if (entry.name.startswith(vid_id) and entry.is_file()
+                                and entry.stat().st_size > MIN_VALID_AUDIO_SIZE_BYTES):
+                            return entry.path
                         
         return None
 
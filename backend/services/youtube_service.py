@@ -1,11 +1,14 @@
 import logging
 import random
+import threading
 import time
 import json
 import os
 import re
 import requests
 import yt_dlp
+from requests.adapters import HTTPAdapter
+from collections import deque
 from typing import Optional, Dict, Any, Tuple, List
 from flask import Response, jsonify
 
@@ -19,9 +22,66 @@ logger = logging.getLogger('subtide')
 VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
 
 # Reserved filenames on Windows (for cross-platform safety)
-RESERVED_NAMES = {'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4',
-                  'COM5', 'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2',
-                  'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'}
+RESERVED_NAMES = frozenset({'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4',
+                            'COM5', 'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2',
+                            'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'})
+
+# Characters dropped by sanitize_video_id: anything not alphanumeric, hyphen, or underscore
+# (\w is Unicode-aware, so this matches str.isalnum() plus '_')
+_UNSAFE_ID_CHARS = re.compile(r'[^\w-]')
+
+# Shared HTTP session so subtitle downloads and their retries reuse pooled keep-alive
+# connections instead of a new TCP+TLS handshake per request. Adapter retries are off:
+# 429/backoff handling is done by the callers.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+_session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+
+# Upper bound on a server-supplied Retry-After (keeps worst-case request blocking
+# in line with the default backoff)
+MAX_RETRY_AFTER_SECONDS = 10
+
+# Backoff after a 429 without a usable Retry-After: exponential with up to 50% jitter,
+# plus RATE_LIMIT_PRESSURE_SECONDS for every other 429 seen process-wide in the last
+# RATE_LIMIT_WINDOW_SECONDS, so concurrent workers spread out instead of retrying in lockstep
+RATE_LIMIT_BASE_SECONDS = 2.0
+RATE_LIMIT_MAX_SECONDS = 30.0
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+RATE_LIMIT_PRESSURE_SECONDS = 0.5
+
+_recent_rate_limits: deque = deque(maxlen=256)
+_rate_limits_lock = threading.Lock()
+
+
+def _record_rate_limit() -> int:
+    """Record a 429 response and return how many were seen in the last window, this one included."""
+    now = time.monotonic()
+    with _rate_limits_lock:
+        _recent_rate_limits.append(now)
+        cutoff = now - RATE_LIMIT_WINDOW_SECONDS
+        while _recent_rate_limits[0] < cutoff:
+            _recent_rate_limits.popleft()
+        return len(_recent_rate_limits)
+
+
+def _rate_limit_wait(res: Any, attempt: int, recent: int = 1) -> float:
+    """
+    Seconds to wait after a 429 response.
+
+    Honors a delta-seconds Retry-After header when present (capped), otherwise
+    falls back to exponential backoff with jitter, lengthened by the number of
+    recent 429s across the process (recent, as returned by _record_rate_limit).
+    """
+    headers = getattr(res, 'headers', None)
+    retry_after = headers.get('Retry-After') if headers else None
+    if isinstance(retry_after, str) and retry_after.strip().isdecimal():
+        try:
+            return float(min(int(retry_after.strip()), MAX_RETRY_AFTER_SECONDS))
+        except ValueError:
+            pass
+    backoff = RATE_LIMIT_BASE_SECONDS * 2 ** attempt * (1 + random.uniform(0, 0.5))
+    pressure = RATE_LIMIT_PRESSURE_SECONDS * max(0, recent - 1)
+    return min(backoff + pressure, RATE_LIMIT_MAX_SECONDS)
 
 
 def validate_video_id(video_id: str) -> bool:
@@ -71,7 +131,7 @@ def sanitize_video_id(video_id: str) -> str:
         raise ValueError("Video ID cannot be empty")
 
     # Remove any characters that aren't alphanumeric, hyphen, or underscore
-    safe_vid_id = "".join([c for c in video_id if c.isalnum() or c in ('-', '_')])
+    safe_vid_id = _UNSAFE_ID_CHARS.sub('', video_id)
 
     # Validate length (allow up to 128 chars for hashes/urls)
     if not (1 <= len(safe_vid_id) <= 128):
@@ -166,13 +226,16 @@ def fetch_subtitles(video_id: str, lang: str = 'en') -> Tuple[Any, int]:
             }
             
             res = None
-            for attempt in range(3):
-                res = requests.get(selected.get('url'), headers=headers, timeout=30)
+            max_attempts = 3
+            for attempt in range(max_attempts):
+                res = _session.get(selected.get('url'), headers=headers, timeout=30)
                 if res.status_code == 200:
                     break
                 elif res.status_code == 429:
-                    wait_time = (attempt + 1) * 2 + random.uniform(0, 1)
-                    time.sleep(wait_time)
+                    recent = _record_rate_limit()
+                    # No point waiting after the final attempt
+                    if attempt < max_attempts - 1:
+                        time.sleep(_rate_limit_wait(res, attempt, recent))
                 else:
                     return {'error': f'YouTube returned status {res.status_code}', 'retry': True}, 502
             
@@ -191,8 +254,9 @@ def fetch_subtitles(video_id: str, lang: str = 'en') -> Tuple[Any, int]:
                             'used_fallback': True,
                             'warning': f'Requested language "{lang}" was not available, using "{fallback_lang}" instead'
                         }
+                    # json.dumps takes the C encoder path; json.dump with indent streams through the pure-Python one
                     with open(cache_path, 'w', encoding='utf-8') as f:
-                        json.dump(json_data, f, indent=2)
+                        f.write(json.dumps(json_data))
                     return json_data, 200
                 except Exception as e:
                     logger.warning(f"JSON parse error: {e}")
@@ -282,12 +346,15 @@ def await_download_subtitles(video_id: str, lang: str, tracks: List[Dict]) -> Li
         # Retry logic for rate limits
         max_retries = 3
         for attempt in range(max_retries):
-            res = requests.get(selected.get('url'), headers=headers, timeout=30)
+            res = _session.get(selected.get('url'), headers=headers, timeout=30)
             
             if res.status_code == 200:
                 break
             elif res.status_code == 429:
-                wait_time = (attempt + 1) * 2 + random.uniform(0, 1)
+                recent = _record_rate_limit()
+                if attempt == max_retries - 1:
+                    continue  # Final attempt: fall through to the failure branch without waiting
+                wait_time = _rate_limit_wait(res, attempt, recent)
                 logger.warning(f"[PROCESS] Rate limited (429), waiting {wait_time:.1f}s before retry {attempt+1}/{max_retries}")
                 time.sleep(wait_time)
             else:
@@ -305,7 +372,7 @@ def await_download_subtitles(video_id: str, lang: str, tracks: List[Dict]) -> Li
 
         # Cache
         with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(yt_subs, f, indent=2)
+            f.write(json.dumps(yt_subs))
 
     # Convert to subtitle format
     subtitles = []
@@ -3,6 +3,7 @@ import sys
 import pytest
 import tempfile
 import shutil
+from unittest.mock import MagicMock, patch
 
 # Add backend to path so we can import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -14,6 +15,8 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "network: marks tests that require network access")
 
 from app import app as flask_app
+from backend.services import translation_service
+from backend.services.llm import factory as llm_factory
 
 @pytest.fixture
 def app():
@@ -44,3 +47,76 @@ def mock_cache_dir():
     
     # Cleanup
     shutil.rmtree(temp_dir)
+
+
+class FakeProvider:
+    """
+    Plain stand-in for an LLM provider.
+
+    Only the call surfaces are mocks; identity attributes are plain values so the
+    object is cheap to build and behaves the same in every xdist worker.
+    """
+
+    def __init__(self):
+        self.generate_json = MagicMock()
+        self.generate_text = MagicMock()
+        self._set_defaults()
+
+    def _set_defaults(self):
+        self.concurrency_limit = 3
+        self.provider_name = "mock_provider"
+        self.default_model = "mock-model"
+
+    def reset(self):
+        """Restore defaults so per-test tweaks do not leak into later tests."""
+        self._set_defaults()
+        for method in (self.generate_json, self.generate_text):
+            method.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="session")
+def fake_provider():
+    """LLM provider fake shared across the session (reset after every test)."""
+    return FakeProvider()
+
+
+@pytest.fixture
+def mock_provider(fake_provider):
+    return fake_provider
+
+
+@pytest.fixture
+def mock_get_llm_provider(mock_provider, mock_cache_dir):
+    # Patch the factory function where it is defined; keep batch-time history
+    # written by translation runs out of the real cache directory
+    with patch.object(llm_factory, 'get_llm_provider', return_value=mock_provider) as mock, \
+         patch.object(translation_service, 'CACHE_DIR', mock_cache_dir):
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def _clear_translation_cache():
+    """Keep cached subtitle translations from leaking between tests."""
+    from backend.utils import translation_cache
+    translation_cache.clear()
+    yield
+    translation_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_whisper_caches():
+    """Re-probe the Whisper device and re-decode audio in every test so mocks take effect."""
+    from backend.services import whisper_service
+    whisper_service._whisper_devices.clear()
+    whisper_service._decode_pcm_16k_mono.cache_clear()
+    yield
+    whisper_service._whisper_devices.clear()
+    whisper_service._decode_pcm_16k_mono.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_fake_provider(request):
+    """Reset per-test configuration on the shared provider fake."""
+    yield
+    if 'fake_provider' in request.fixturenames:
+        request.getfixturevalue('fake_provider').reset()
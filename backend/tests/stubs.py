@@ -0,0 +1,37 @@
+"""
+Plain data stand-ins for LLM SDK response objects.
+
+Frozen dataclasses are used instead of MagicMock trees so attribute access is
+ordinary field lookup and typos fail loudly instead of fabricating child mocks.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class FakeUsage:
+    prompt_tokens: int = 100
+    completion_tokens: int = 50
+    total_tokens: int = 150
+
+
+@dataclass(frozen=True)
+class FakeMessage:
+    content: Optional[str]
+
+
+@dataclass(frozen=True)
+class FakeChoice:
+    message: FakeMessage
+
+
+@dataclass(frozen=True)
+class FakeResponse:
+    choices: List[FakeChoice]
+    usage: FakeUsage = field(default_factory=FakeUsage)
+
+
+def chat_response(content: Optional[str]) -> FakeResponse:
+    """Build an OpenAI-style chat completion with a single choice."""
+    return FakeResponse(choices=[FakeChoice(FakeMessage(content))])
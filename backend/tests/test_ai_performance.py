@@ -52,7 +52,7 @@ def test_whisper_performance(test_audio):
         pytest.skip(f"Whisper performance test skipped: {e}")
 
 @pytest.mark.benchmark
-def test_translation_performance():
+def test_translation_performance(mock_cache_dir):
     """Benchmark LLM translation performance."""
     logger.info("Starting Translation performance benchmark...")
 
@@ -70,7 +70,8 @@ def test_translation_performance():
         "translations": [f"Traducción {i}" for i in range(20)]
     }
 
-    with patch('backend.services.llm.factory.get_llm_provider', return_value=mock_provider):
+    with patch('backend.services.llm.factory.get_llm_provider', return_value=mock_provider), \
+         patch('backend.services.translation_service.CACHE_DIR', mock_cache_dir):
         start_time = time.time()
         result = await_translate_subtitles(segments, "Spanish")
         elapsed = time.time() - start_time
@@ -0,0 +1,137 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend.utils import audio_normalization
+from backend.utils.audio_normalization import _parse_loudnorm_json, get_audio_stats, normalize_audio
+
+LOUDNORM_STDERR = """[Parsed_loudnorm_0 @ 0x55d0c8a0] 
+{
+	"input_i" : "-27.61",
+	"input_tp" : "-4.47",
+	"input_lra" : "18.06",
+	"input_thresh" : "-39.20",
+	"output_i" : "-16.58",
+	"output_tp" : "-1.50",
+	"output_lra" : "14.78",
+	"output_thresh" : "-27.71",
+	"normalization_type" : "dynamic",
+	"target_offset" : "0.58"
+}
+"""
+
+
+def _ffmpeg(stderr=LOUDNORM_STDERR, returncode=0):
+    return SimpleNamespace(stderr=stderr, returncode=returncode)
+
+
+def test_get_audio_stats_is_cached_per_file_version(tmp_path):
+    audio = tmp_path / 'audio.m4a'
+    audio.write_bytes(b'fake')
+
+    with patch('backend.utils.audio_normalization._run_ffmpeg', return_value=_ffmpeg()) as mock_run:
+        stats = get_audio_stats(str(audio))
+        assert get_audio_stats(str(audio)) == stats
+        assert mock_run.call_count == 1
+
+        # A changed file is measured again
+        os.utime(audio, ns=(0, 0))
+        get_audio_stats(str(audio))
+        assert mock_run.call_count == 2
+
+    assert stats['input_i'] == '-27.61'
+    assert (tmp_path / 'audio_loudnorm.json').exists()
+
+
+def test_get_audio_stats_failure_is_not_cached(tmp_path):
+    audio = tmp_path / 'audio.m4a'
+    audio.write_bytes(b'fake')
+
+    with patch('backend.utils.audio_normalization._run_ffmpeg', return_value=_ffmpeg(stderr='no stats')):
+        assert get_audio_stats(str(audio)) == {}
+    assert not (tmp_path / 'audio_loudnorm.json').exists()
+
+
+def test_normalize_audio_applies_measured_values(tmp_path):
+    audio = tmp_path / 'audio.m4a'
+    audio.write_bytes(b'fake')
+
+    def run(cmd, timeout):
+        if cmd[-1] != '-':
+            with open(cmd[-1], 'wb') as f:
+                f.write(b'normalized')
+        return _ffmpeg()
+
+    with patch('backend.utils.audio_normalization._run_ffmpeg', side_effect=run) as mock_run:
+        output = normalize_audio(str(audio))
+
+    assert output == str(tmp_path / 'audio_normalized.m4a')
+    filter_str = mock_run.call_args_list[-1][0][0][4]
+    assert filter_str == (
+        'loudnorm=I=-16.0:TP=-1.5:LRA=11'
+        ':measured_I=-27.61:measured_TP=-4.47:measured_LRA=18.06:measured_thresh=-39.20:offset=0.58'
+        ':linear=true:print_format=summary'
+    )
+
+
+def test_normalize_audio_without_measurement_uses_single_pass(tmp_path):
+    audio = tmp_path / 'audio.m4a'
+    audio.write_bytes(b'fake')
+
+    with patch.object(audio_normalization, 'get_audio_stats', return_value={}), \
+         patch('backend.utils.audio_normalization._run_ffmpeg', return_value=_ffmpeg(returncode=1)) as mock_run:
+        assert normalize_audio(str(audio)) == str(audio)
+
+    assert mock_run.call_args[0][0][4] == 'loudnorm=I=-16.0:TP=-1.5:LRA=11:print_format=summary'
+
+
+def test_normalize_audio_silent_measurement_uses_single_pass(tmp_path):
+    """ffmpeg rejects measured_I=-inf, so silent input keeps the single-pass filter."""
+    audio = tmp_path / 'audio.m4a'
+    audio.write_bytes(b'fake')
+    silent = {'input_i': '-inf', 'input_tp': '-inf', 'input_lra': '0.00',
+              'input_thresh': '-inf', 'target_offset': 'inf'}
+
+    with patch.object(audio_normalization, 'get_audio_stats', return_value=silent), \
+         patch('backend.utils.audio_normalization._run_ffmpeg', return_value=_ffmpeg(returncode=1)) as mock_run:
+        normalize_audio(str(audio))
+
+    assert mock_run.call_args[0][0][4] == 'loudnorm=I=-16.0:TP=-1.5:LRA=11:print_format=summary'
+
+
+def test_parse_loudnorm_json_reads_block_after_last_marker():
+    stderr = (
+        "Input #0, mov,mp4,m4a, from 'a.m4a': {not json}\n"
+        + LOUDNORM_STDERR.replace('"input_i" : "-27.61"', '"input_i" : "-30.00"')
+        + LOUDNORM_STDERR
+        + "[out#0/null @ 0x1] video:0KiB audio:1KiB\n"
+    )
+    stats = _parse_loudnorm_json(stderr)
+    assert stats['input_i'] == '-27.61'
+    assert stats['target_offset'] == '0.58'
+
+
+def test_parse_loudnorm_json_handles_nesting_and_garbage():
+    assert _parse_loudnorm_json('[Parsed_loudnorm_0 @ 0x1]\n{"a": {"b": "}"}}\ntrailing') == {'a': {'b': '}'}}
+    assert _parse_loudnorm_json('[Parsed_loudnorm_0 @ 0x1]\n{"a": ') == {}
+    assert _parse_loudnorm_json('no json here') == {}
+
+
+def test_run_ffmpeg_keeps_only_stderr_tail(monkeypatch):
+    monkeypatch.setattr(audio_normalization, 'FFMPEG_STDERR_TAIL_LINES', 3)
+    script = "import sys\nfor i in range(1000): print(f'line {i}', file=sys.stderr)\nsys.exit(2)"
+
+    result = audio_normalization._run_ffmpeg([sys.executable, '-c', script], timeout=30)
+
+    assert result.returncode == 2
+    assert result.stderr == 'line 997\nline 998\nline 999\n'
+
+
+def test_run_ffmpeg_times_out():
+    with pytest.raises(subprocess.TimeoutExpired):
+        audio_normalization._run_ffmpeg([sys.executable, '-c', 'import time; time.sleep(30)'], timeout=0.2)
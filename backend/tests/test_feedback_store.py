@@ -0,0 +1,132 @@
+import json
+import os
+from collections import Counter
+import pytest
+from backend.utils import feedback_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """feedback_store pointed at an empty temp dir, with its in-memory copy reset."""
+    monkeypatch.setattr(feedback_store, 'FEEDBACK_DIR', str(tmp_path))
+    monkeypatch.setattr(feedback_store, 'FEEDBACK_FILE', str(tmp_path / 'translation_feedback.jsonl'))
+    monkeypatch.setattr(feedback_store, 'LEGACY_FEEDBACK_FILE', str(tmp_path / 'translation_feedback.json'))
+    monkeypatch.setattr(feedback_store, '_feedback', None)
+    monkeypatch.setattr(feedback_store, '_file_entries', 0)
+    monkeypatch.setattr(feedback_store, '_file_offset', 0)
+    monkeypatch.setattr(feedback_store, '_file_id', None)
+    monkeypatch.setattr(feedback_store, '_negative_by_lang', Counter())
+    return feedback_store
+
+
+def _lines(store):
+    with open(store.FEEDBACK_FILE, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_store_feedback_appends_one_line_per_entry(store):
+    assert store.store_feedback('vid', 0, 1, source_text='Hello', target_lang='ja')
+    assert store.store_feedback('vid', 1, -1, translated_text='こんにちは', target_lang='ja')
+
+    entries = _lines(store)
+    assert [e['segment_index'] for e in entries] == [0, 1]
+    assert entries[1]['translated_text'] == 'こんにちは'
+    assert store.get_feedback_stats() == {'total': 2, 'positive': 1, 'negative': 1, 'ratio': 0.5}
+
+
+def test_feedback_survives_reload(store, monkeypatch):
+    store.store_feedback('vid', 0, -1, target_lang='de')
+    monkeypatch.setattr(store, '_feedback', None)
+    assert store.get_problematic_patterns() == [{'target_lang': 'de', 'negative_count': 1}]
+
+
+def test_malformed_line_is_skipped(store):
+    with open(store.FEEDBACK_FILE, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'rating': 1}) + '\n{"rating": -')
+    assert store.get_feedback_stats()['total'] == 1
+
+
+def test_legacy_json_file_is_migrated(store):
+    with open(store.LEGACY_FEEDBACK_FILE, 'w', encoding='utf-8') as f:
+        json.dump([{'rating': 1}, {'rating': -1, 'target_lang': 'fr'}], f)
+
+    assert store.get_feedback_stats()['total'] == 2
+    assert _lines(store) == [{'rating': 1}, {'rating': -1, 'target_lang': 'fr'}]
+
+
+def test_size_limit_compacts_file_periodically(store, monkeypatch):
+    monkeypatch.setattr(store, 'MAX_FEEDBACK_ENTRIES', 5)
+    monkeypatch.setattr(store, 'COMPACT_EVERY', 3)
+
+    for i in range(7):
+        store.store_feedback('vid', i, 1)
+    # Memory holds the newest 5; the file still carries the 2 trimmed entries
+    assert store.get_feedback_stats()['total'] == 5
+    assert len(_lines(store)) == 7
+
+    store.store_feedback('vid', 7, 1)
+    assert [e['segment_index'] for e in _lines(store)] == [3, 4, 5, 6, 7]
+
+
+def _append_from_other_worker(store, entry):
+    with open(store.FEEDBACK_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def test_compaction_keeps_lines_appended_by_other_workers(store, monkeypatch):
+    monkeypatch.setattr(store, 'MAX_FEEDBACK_ENTRIES', 5)
+    monkeypatch.setattr(store, 'COMPACT_EVERY', 3)
+
+    for i in range(6):
+        store.store_feedback('vid', i, 1)
+    _append_from_other_worker(store, {'video_id': 'other', 'segment_index': 99, 'rating': -1})
+
+    store.store_feedback('vid', 6, 1)
+    assert [e['segment_index'] for e in _lines(store)] == [3, 4, 5, 99, 6]
+
+
+def test_stats_include_other_workers_feedback(store):
+    store.store_feedback('vid', 0, 1)
+    _append_from_other_worker(store, {'rating': -1, 'target_lang': 'ko'})
+    assert store.get_feedback_stats() == {'total': 2, 'positive': 1, 'negative': 1, 'ratio': 0.5}
+
+    # Another worker compacted the file: reload it rather than reading from a stale offset
+    tmp_path = store.FEEDBACK_FILE + '.other'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'rating': -1, 'target_lang': 'ko'}) + '\n')
+    os.replace(tmp_path, store.FEEDBACK_FILE)
+    assert store.get_problematic_patterns() == [{'target_lang': 'ko', 'negative_count': 1}]
+    assert store.get_feedback_stats()['total'] == 1
+
+
+def test_aggregates_follow_trimmed_entries(store, monkeypatch):
+    monkeypatch.setattr(store, 'MAX_FEEDBACK_ENTRIES', 3)
+
+    store.store_feedback('vid', 0, -1, target_lang='ja')
+    store.store_feedback('vid', 1, -1, target_lang='de')
+    store.store_feedback('vid', 2, -1, target_lang='de')
+    assert store.get_problematic_patterns() == [
+        {'target_lang': 'de', 'negative_count': 2},
+        {'target_lang': 'ja', 'negative_count': 1},
+    ]
+
+    # The oldest (ja, negative) entry falls out of the window
+    store.store_feedback('vid', 3, 1, target_lang='ja')
+    assert store.get_feedback_stats() == {'total': 3, 'positive': 1, 'negative': 2, 'ratio': 1 / 3}
+    assert store.get_problematic_patterns() == [{'target_lang': 'de', 'negative_count': 2}]
+
+
+def test_empty_store_stats(store):
+    assert store.get_feedback_stats() == {'total': 0, 'positive': 0, 'negative': 0, 'ratio': 0.0}
+    assert store.get_problematic_patterns() == []
+
+
+def test_text_fields_are_capped_in_utf8_bytes(store):
+    store.store_feedback('vid', 0, 1, source_text='a' * 600, translated_text='日本語' * 100, user_correction='短い')
+
+    entry = _lines(store)[0]
+    assert entry['source_text'] == 'a' * 500
+    # 3 bytes per character: 166 whole characters fit, the split 167th is dropped
+    assert len(entry['translated_text'].encode('utf-8')) == 498
+    assert entry['translated_text'] == ('日本語' * 100)[:166]
+    assert entry['user_correction'] == '短い'
@@ -32,11 +32,11 @@ def test_process_video_logic_queue_timeout(mock_dependencies):
     # try: msg = queue.get(timeout=10)
     # except Empty: if worker.alive: yield PING
     
-    # To test this fast, we mock queue.Queue to raise Empty immediately?
+    # To test this fast, we mock queue.SimpleQueue to raise Empty immediately?
     # But queue is instantiated INSIDE `generate`.
-    # `progress_queue = queue.Queue()`
+    # `progress_queue = queue.SimpleQueue()` (no task_done() bookkeeping needed)
     
-    with patch('backend.services.process_service.queue.Queue') as MockQueue:
+    with patch('backend.services.process_service.queue.SimpleQueue') as MockQueue:
         q_instance = MockQueue.return_value
         # First call raises Empty, Second call returns error to finish loop
         q_instance.get.side_effect = [queue.Empty, ('error', 'Stop')]
@@ -65,10 +65,12 @@ def test_process_video_logic_queue_timeout(mock_dependencies):
             err = json.loads(events[1].replace('data: ', ''))
             assert err.get('error') == 'Stop'
 
+            MockQueue.assert_called_once_with()
+
 @patch('backend.services.process_service.SERVER_API_KEY', 'fake-key')
 def test_process_video_logic_worker_died(mock_dependencies):
     # Queue Empty and worker dead -> yield unexpected exit
-    with patch('backend.services.process_service.queue.Queue') as MockQueue:
+    with patch('backend.services.process_service.queue.SimpleQueue') as MockQueue:
         q_instance = MockQueue.return_value
         q_instance.get.side_effect = [queue.Empty]
         
@@ -96,7 +98,7 @@ def test_process_video_logic_invalid_audio(mock_dependencies):
         
         with patch('backend.services.process_service.validate_audio_file', return_value=(False, 'Too small')):
              
-             # Need to run real thread logic so we don't mock Queue here.
+             # Need to run real thread logic so we don't mock SimpleQueue here.
              # We rely on do_work putting error in queue.
              
              generator = process_video_logic('vid', 'en', False, True)
@@ -35,12 +35,11 @@ def test_validate_audio_file_unpacking():
     """
     Verifies that the function can be unpacked without ValueError/TypeError.
     """
-    with patch('os.path.exists', return_value=True), \
-         patch('os.path.getsize', return_value=100):
+    with patch('os.stat', return_value=MagicMock(st_size=100)):
         try:
             is_valid, err_msg = validate_audio_file("fake.mp3")
             assert is_valid is True
         except (TypeError, ValueError) as e:
             pytest.fail(f"Unpacking failed: {e}")
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
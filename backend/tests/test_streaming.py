@@ -3,7 +3,29 @@ Tests for streaming Whisper functionality.
 """
 import pytest
 from unittest.mock import MagicMock, patch, mock_open
+import contextlib
 import json
+from types import SimpleNamespace
+
+_SUBS_PAYLOAD = {
+    'events': [
+        {'tStartMs': 0, 'dDurationMs': 2000, 'segs': [{'utf8': 'Hello'}]}
+    ]
+}
+
+_EMPTY_WHISPER_JSON = {'segments': [], 'text': ''}
+
+
+def _whisper_fs_mocks(json_payload=_EMPTY_WHISPER_JSON):
+    """Patch the temp-file round trip run_whisper_streaming does after the subprocess exits."""
+    stack = contextlib.ExitStack()
+    mock_temp = stack.enter_context(patch('tempfile.NamedTemporaryFile'))
+    stack.enter_context(patch('os.path.exists', return_value=True))
+    stack.enter_context(patch('os.unlink'))
+    stack.enter_context(patch('builtins.open', mock_open(read_data=json.dumps(json_payload))))
+    mock_temp.return_value.__enter__.return_value.name = '/tmp/test.json'
+    mock_temp.return_value.name = '/tmp/test.json'
+    return stack
 
 
 class TestWhisperRunner:
@@ -55,16 +77,7 @@ class TestRunWhisperStreaming:
             received_segments.append(segment)
         
         # Mock temp file and JSON result
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.path.exists', return_value=True), \
-             patch('os.unlink'), \
-             patch('builtins.open', mock_open(read_data=json.dumps({
-                 'segments': [], 'text': 'Hello world This is a test Third segment'
-             }))):
-            
-            mock_temp.return_value.__enter__.return_value.name = '/tmp/test.json'
-            mock_temp.return_value.name = '/tmp/test.json'
-            
+        with _whisper_fs_mocks({'segments': [], 'text': 'Hello world This is a test Third segment'}):
             result = run_whisper_streaming(
                 '/path/to/audio.mp3',
                 segment_callback=segment_callback
@@ -101,18 +114,9 @@ class TestRunWhisperStreaming:
         mock_process.returncode = 0
         mock_popen.return_value = mock_process
 
-        progress_calls = []
-        def progress_callback(stage, message, percent):
-            progress_calls.append((stage, message, percent))
-
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.path.exists', return_value=True), \
-             patch('os.unlink'), \
-             patch('builtins.open', mock_open(read_data=json.dumps({'segments': [], 'text': ''}))):
-
-            mock_temp.return_value.__enter__.return_value.name = '/tmp/test.json'
-            mock_temp.return_value.name = '/tmp/test.json'
+        progress_callback = MagicMock()
 
+        with _whisper_fs_mocks():
             run_whisper_streaming(
                 '/path/to/audio.mp3',
                 progress_callback=progress_callback
@@ -120,10 +124,12 @@ class TestRunWhisperStreaming:
 
         # Progress should be called for each segment + completion
         # 10 segments + 1 completion = 11 calls
-        assert len(progress_calls) == 11
+        calls = progress_callback.call_args_list
+        assert len(calls) == 11
         # Last call should be completion
-        assert progress_calls[-1][0] == 'whisper'
-        assert 'complete' in progress_calls[-1][1].lower()
+        stage, message, _percent = calls[-1].args
+        assert stage == 'whisper'
+        assert 'complete' in message.lower()
 
     @patch('backend.services.whisper_service.subprocess.Popen')
     @patch('backend.services.whisper_service.get_mlx_model_path')
@@ -151,14 +157,7 @@ class TestRunWhisperStreaming:
         def segment_callback(segment):
             received_segments.append(segment)
 
-        with patch('tempfile.NamedTemporaryFile') as mock_temp, \
-             patch('os.path.exists', return_value=True), \
-             patch('os.unlink'), \
-             patch('builtins.open', mock_open(read_data=json.dumps({'segments': [], 'text': ''}))):
-
-            mock_temp.return_value.__enter__.return_value.name = '/tmp/test.json'
-            mock_temp.return_value.name = '/tmp/test.json'
-
+        with _whisper_fs_mocks():
             run_whisper_streaming(
                 '/path/to/audio.mp3',
                 segment_callback=segment_callback
@@ -178,6 +177,56 @@ class TestRunWhisperStreaming:
         assert abs(received_segments[2]['start'] - 3599.999) < 0.01
         assert received_segments[2]['end'] == 3600.0
 
+    @patch('backend.services.whisper_service.subprocess.Popen')
+    @patch('backend.services.whisper_service.get_mlx_model_path')
+    def test_segments_delivered_as_lines_arrive(self, mock_model_path, mock_popen):
+        """Each stdout line reaches segment_callback promptly, not in buffered bursts."""
+        import os
+        import threading
+        import time
+        from backend.services.whisper_service import run_whisper_streaming
+
+        mock_model_path.return_value = 'mlx-community/whisper-small-mlx'
+
+        line_count = 20
+        interval = 0.02
+        read_fd, write_fd = os.pipe()
+        write_times = []
+
+        def writer():
+            for i in range(line_count):
+                write_times.append(time.perf_counter())
+                os.write(write_fd, f'[00:{i:02d}.000 --> 00:{i+1:02d}.000]  Segment {i}\n'.encode())
+                time.sleep(interval)
+            os.close(write_fd)
+
+        mock_process = MagicMock()
+        mock_process.stdout = os.fdopen(read_fd, 'r', buffering=1)
+        mock_process.stderr = iter([])
+        mock_process.returncode = 0
+        mock_popen.return_value = mock_process
+
+        receive_times = []
+        def segment_callback(segment):
+            receive_times.append(time.perf_counter())
+
+        writer_thread = threading.Thread(target=writer)
+        with _whisper_fs_mocks():
+            writer_thread.start()
+            run_whisper_streaming('/path/to/audio.mp3', segment_callback=segment_callback)
+        writer_thread.join()
+        mock_process.stdout.close()
+
+        assert len(receive_times) == line_count
+        # A block-buffered reader would deliver everything at EOF (~0.4s after the first write)
+        assert max(r - w for r, w in zip(receive_times, write_times)) < 0.1
+
+        # The subprocess must be configured for line-buffered, unbuffered-Python output
+        popen_kwargs = mock_popen.call_args.kwargs
+        assert popen_kwargs['bufsize'] == 1
+        assert popen_kwargs['text'] is True
+        assert popen_kwargs['env']['PYTHONUNBUFFERED'] == '1'
+
 
 class TestStreamVideoLogic:
     """Tests for streaming video logic in process_service."""
@@ -202,36 +251,30 @@ class TestStreamVideoLogic:
 class TestYouTubeService429Retry:
     """Tests for 429 retry logic in youtube_service."""
     
-    @patch('backend.services.youtube_service.requests.get')
+    @patch('backend.services.youtube_service._session.get')
     def test_retry_on_429(self, mock_get):
-        """Test that 429 responses trigger retry logic."""
+        """Test that 429 responses trigger retry logic honoring Retry-After."""
         from backend.services.youtube_service import await_download_subtitles
-        
+
         # First call returns 429, second succeeds
-        response_429 = MagicMock()
-        response_429.status_code = 429
-        
-        response_200 = MagicMock()
-        response_200.status_code = 200
-        response_200.json.return_value = {
-            'events': [
-                {'tStartMs': 0, 'dDurationMs': 2000, 'segs': [{'utf8': 'Hello'}]}
-            ]
-        }
-        
+        response_429 = SimpleNamespace(status_code=429, headers={'Retry-After': '1'}, json=lambda: {})
+        response_200 = SimpleNamespace(status_code=200, headers={}, json=lambda _cache=_SUBS_PAYLOAD: _cache)
+
         mock_get.side_effect = [response_429, response_200]
-        
+
         tracks = [{'ext': 'json3', 'url': 'https://example.com/subs'}]
-        
+
         with patch('backend.services.youtube_service.get_cache_path', return_value='/tmp/test_cache.json'), \
              patch('os.path.exists', return_value=False), \
              patch('builtins.open', mock_open()), \
-             patch('time.sleep'):  # Skip actual waiting
-            
+             patch('time.sleep') as mock_sleep:  # Skip actual waiting
+
             result = await_download_subtitles('test_video', 'en', tracks)
-        
+
         # Should have called get twice (retry after 429)
         assert mock_get.call_count == 2
+        # Server-provided Retry-After is used as the wait time
+        mock_sleep.assert_called_once_with(1.0)
         # Should have returned subtitles
         assert len(result) == 1
         assert result[0]['text'] == 'Hello'
@@ -278,7 +321,7 @@ class TestSendSubtitles:
         import queue
         
         # Create a test queue and send_subtitles function
-        progress_queue = queue.Queue()
+        progress_queue = queue.SimpleQueue()
         
         def send_subtitles(batch_num, total_batches, subtitles_batch):
             data = {
@@ -301,3 +344,114 @@ class TestSendSubtitles:
         assert data['batchInfo']['current'] == 1
         assert data['batchInfo']['total'] == 5
         assert data['subtitles'] == test_subs
+
+    def test_queued_batches_are_coalesced(self):
+        """Subtitle batches already queued are merged into fewer SSE events."""
+        import queue
+        from backend.services.process_service import _coalesce_subtitle_batches
+
+        progress_queue = queue.SimpleQueue()
+        for n in range(2, 102):
+            progress_queue.put(('progress', {
+                'stage': 'subtitles',
+                'message': f'Batch {n}/101 ready',
+                'batchInfo': {'current': n, 'total': 101},
+                'subtitles': [{'start': n, 'end': n + 1, 'text': f'Sub {n}'}]
+            }))
+
+        events = []
+        while not progress_queue.empty():
+            _, data = progress_queue.get_nowait()
+            merged, pending = _coalesce_subtitle_batches(data, progress_queue)
+            assert pending == []
+            events.append(merged)
+
+        assert len(events) <= 25
+        assert sum(len(e['subtitles']) for e in events) == 100
+        assert events[-1]['batchInfo'] == {'current': 101, 'total': 101}
+
+    def test_coalescing_stops_at_non_subtitle_message(self):
+        """A non-subtitle message ends the merge and is handed back in order."""
+        import queue
+        from backend.services.process_service import _coalesce_subtitle_batches
+
+        first = {'stage': 'subtitles', 'batchInfo': {'current': 2, 'total': 3},
+                 'subtitles': [{'text': 'a'}]}
+        second = {'stage': 'subtitles', 'batchInfo': {'current': 3, 'total': 3},
+                  'subtitles': [{'text': 'b'}]}
+        progress_queue = queue.SimpleQueue()
+        progress_queue.put(('progress', second))
+        progress_queue.put(('result', {'done': True}))
+        progress_queue.put(('progress', {'stage': 'subtitles', 'subtitles': [{'text': 'c'}]}))
+
+        merged, pending = _coalesce_subtitle_batches(first, progress_queue)
+
+        assert [s['text'] for s in merged['subtitles']] == ['a', 'b']
+        assert merged['batchInfo']['current'] == 3
+        assert first['subtitles'] == [{'text': 'a'}]  # Original event untouched
+        assert pending == [('result', {'done': True})]
+        assert progress_queue.qsize() == 1
+
+    def test_late_batch_one_is_never_merged(self):
+        """Batch 1 finishing after later batches is still emitted as its own event."""
+        import queue
+        from backend.services.process_service import _coalesce_subtitle_batches
+
+        def subs_event(n):
+            return ('progress', {'stage': 'subtitles', 'batchInfo': {'current': n, 'total': 3},
+                                 'subtitles': [{'text': f'Sub {n}'}]})
+
+        progress_queue = queue.SimpleQueue()
+        progress_queue.put(subs_event(1))
+        progress_queue.put(subs_event(3))
+
+        _, first = subs_event(2)
+        merged, pending = _coalesce_subtitle_batches(first, progress_queue)
+
+        assert merged is first
+        assert pending == [subs_event(1)]
+        assert progress_queue.qsize() == 1
+
+    def test_interleaved_translating_progress_is_absorbed(self):
+        """Real translation order (batch, progress, batch, progress...) still coalesces."""
+        import queue
+        from backend.services.process_service import _coalesce_subtitle_batches
+
+        def subs_event(n):
+            return ('progress', {'stage': 'subtitles', 'batchInfo': {'current': n, 'total': 6},
+                                 'subtitles': [{'text': f'Sub {n}'}]})
+
+        def translating_event(n):
+            return ('progress', {'stage': 'translating', 'message': 'Translating subtitles...',
+                                 'batchInfo': {'current': n, 'total': 6}})
+
+        progress_queue = queue.SimpleQueue()
+        progress_queue.put(translating_event(2))
+        for n in range(3, 7):
+            progress_queue.put(subs_event(n))
+            progress_queue.put(translating_event(n))
+
+        _, first = subs_event(2)
+        merged, pending = _coalesce_subtitle_batches(first, progress_queue)
+
+        assert [s['text'] for s in merged['subtitles']] == [f'Sub {n}' for n in range(2, 7)]
+        assert merged['batchInfo']['current'] == 6
+        # Only the latest progress update survives, emitted after the merged batch
+        assert pending == [translating_event(6)]
+        assert progress_queue.empty()
+
+    def test_absorbed_progress_precedes_terminal_message(self):
+        """A held progress update is emitted before the message that stopped draining."""
+        import queue
+        from backend.services.process_service import _coalesce_subtitle_batches
+
+        progress_queue = queue.SimpleQueue()
+        progress = ('progress', {'stage': 'translating', 'message': 'Translating subtitles...'})
+        progress_queue.put(progress)
+        progress_queue.put(('error', 'boom'))
+
+        first = {'stage': 'subtitles', 'batchInfo': {'current': 2, 'total': 2}, 'subtitles': []}
+        merged, pending = _coalesce_subtitle_batches(first, progress_queue)
+
+        assert merged is first
+        assert pending == [progress, ('error', 'boom')]
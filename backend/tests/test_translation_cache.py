@@ -0,0 +1,46 @@
+"""
+Tests for translation_cache.py - In-memory subtitle line cache.
+"""
+
+from unittest.mock import patch
+
+from backend.utils import translation_cache
+from backend.utils.translation_cache import make_key
+
+
+class TestTranslationCache:
+    """Tests for the LRU line cache."""
+
+    def test_miss_then_hit(self):
+        key = make_key(None, 'gpt-4o', 'en', 'es', 'Hello')
+        assert translation_cache.get(key) is None
+
+        translation_cache.put(key, 'Hola')
+        assert translation_cache.get(key) == 'Hola'
+
+    def test_key_ignores_surrounding_whitespace_but_not_model(self):
+        assert make_key(None, 'm', 'en', 'es', ' Hi\n') == make_key('', 'm', 'en', 'es', 'Hi')
+        assert make_key(None, 'm', 'en', 'es', 'Hi') != make_key(None, 'other', 'en', 'es', 'Hi')
+
+    def test_empty_translation_not_stored(self):
+        key = make_key(None, 'm', 'en', 'es', 'Hi')
+        translation_cache.put(key, '')
+        assert translation_cache.get(key) is None
+
+    def test_evicts_least_recently_used(self):
+        keys = [make_key(None, 'm', 'en', 'es', str(i)) for i in range(3)]
+        with patch.object(translation_cache, 'TRANSLATION_CACHE_SIZE', 2):
+            translation_cache.put(keys[0], 'a')
+            translation_cache.put(keys[1], 'b')
+            translation_cache.get(keys[0])  # refresh 0 so 1 is evicted next
+            translation_cache.put(keys[2], 'c')
+
+        assert translation_cache.get(keys[0]) == 'a'
+        assert translation_cache.get(keys[1]) is None
+        assert translation_cache.get(keys[2]) == 'c'
+
+    def test_disabled_when_size_zero(self):
+        key = make_key(None, 'm', 'en', 'es', 'Hi')
+        with patch.object(translation_cache, 'TRANSLATION_CACHE_SIZE', 0):
+            translation_cache.put(key, 'Hola')
+        assert translation_cache.get(key) is None
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch, ANY
+from unittest.mock import patch, mock_open
 import json
 import time
 from backend.services.translation_service import (
@@ -8,6 +8,28 @@ from backend.services.translation_service import (
     await_translate_subtitles
 )
 
+_CORRUPT_JSON_ERROR = json.JSONDecodeError("msg", "doc", 0)
+
+# Prebuilt LLM responses shared by the threading test's concurrent calls
+_HOLA_25 = {"translations": {str(i+1): "Hola" for i in range(25)}}
+_HOLA_5 = {"translations": {str(i+1): "Hola" for i in range(5)}}
+
+
+@pytest.fixture(autouse=True, scope='module')
+def _fake_api_key():
+    """Configure a server API key once for every test in this module."""
+    import backend.services.translation_service as ts
+    old = ts.SERVER_API_KEY
+    ts.SERVER_API_KEY = 'fake-key'
+    yield
+    ts.SERVER_API_KEY = old
+
+
+def _hola_by_batch_size(*args, **kwargs):
+    # Infer batch size from prompts; prompt uses "(1 to 25)" or "(1 to 5)" format
+    prompt = kwargs.get('prompt', '')
+    return _HOLA_25 if "(1 to 25)" in prompt else _HOLA_5
+
 def test_save_batch_time_history_fail(mock_cache_dir):
     # Mock open to raise exception
     with patch('builtins.open', side_effect=IOError("Permission denied")):
@@ -19,20 +41,13 @@ def test_get_historical_batch_time_fail():
         assert get_historical_batch_time() == 3.0
 
 def test_get_historical_batch_time_corrupt(mock_cache_dir):
-    with patch('builtins.open', MagicMock()) as mock_open:
-        mock_open.return_value.__enter__.return_value.read.return_value = "{corrupt"
-        with patch('json.load', side_effect=json.JSONDecodeError("msg", "doc", 0)):
-             assert get_historical_batch_time() == 3.0
-
-@patch('backend.services.llm.factory.get_llm_provider')
-@patch('backend.services.translation_service.SERVER_API_KEY', 'fake-key')
-def test_await_translate_subtitles_rate_limit(mock_get_llm_provider):
-    # Setup mocks
-    mock_provider = mock_get_llm_provider.return_value
-    mock_provider.concurrency_limit = 3
-    mock_provider.provider_name = "mock"
-    mock_provider.default_model = "mock-model"
+    with patch('backend.services.translation_service.os.path.exists', return_value=True), \
+         patch('builtins.open', mock_open(read_data="")), \
+         patch('backend.services.translation_service.json.load', side_effect=_CORRUPT_JSON_ERROR) as mock_load:
+        assert get_historical_batch_time() == 3.0
+        mock_load.assert_called_once()
 
+def test_await_translate_subtitles_rate_limit(mock_get_llm_provider, mock_provider):
     # Batch size is 25. Input 1 batch.
     subs = [{'text': 'Hello'} for _ in range(25)]
 
@@ -56,16 +71,10 @@ def test_await_translate_subtitles_rate_limit(mock_get_llm_provider):
         # Check if sleep called
         mock_sleep.assert_called()
 
-@patch('backend.services.llm.factory.get_llm_provider')
-@patch('backend.services.translation_service.SERVER_API_KEY', 'fake-key')
-def test_await_translate_subtitles_incomplete_and_retry(mock_get_llm_provider):
+def test_await_translate_subtitles_incomplete_and_retry(mock_get_llm_provider, mock_provider):
     # Test retry logic for incomplete batches
-    mock_provider = mock_get_llm_provider.return_value
-    mock_provider.concurrency_limit = 3
-    mock_provider.provider_name = "mock"
-    mock_provider.default_model = "mock-model"
-
-    subs = [{'text': 'Hello'} for _ in range(25)]
+    # Distinct texts, so per-batch dedupe keeps all 25 lines in the prompt
+    subs = [{'text': f'Hello {i}'} for i in range(25)]
 
     # 1st call: Return only 5 translations (incomplete < 80%) with numbered dict format
     incomplete_resp = {"translations": {str(i+1): "Hola" for i in range(5)}}
@@ -90,31 +99,32 @@ def test_await_translate_subtitles_incomplete_and_retry(mock_get_llm_provider):
         res = await_translate_subtitles(subs, 'es')
         assert len(res) == 25
         assert res[24].get('translatedText') == 'Hola'
+        assert mock_provider.generate_json.call_count == 2
 
-@patch('backend.services.llm.factory.get_llm_provider')
-@patch('backend.services.translation_service.SERVER_API_KEY', 'fake-key')
-def test_await_translate_subtitles_threading(mock_get_llm_provider):
+def test_await_translate_subtitles_threading(mock_get_llm_provider, mock_provider):
     # Test with multiple batches to trigger ThreadPool
-    mock_provider = mock_get_llm_provider.return_value
-    mock_provider.concurrency_limit = 3
-    mock_provider.provider_name = "mock"
-    mock_provider.default_model = "mock-model"
 
     # 30 subs -> 2 batches (25, 5)
-    subs = [{'text': 'Hello'} for _ in range(30)]
+    subs = [{'text': f'Hello {i}'} for i in range(30)]
 
-    def side_effect(*args, **kwargs):
-        # Infer batch size from prompts
-        prompt = kwargs.get('prompt', '')
-        # Prompt now uses "(1 to 25)" or "(1 to 5)" format
-        if "(1 to 25)" in prompt:
-            return {"translations": {str(i+1): "Hola" for i in range(25)}}
-        else:
-            return {"translations": {str(i+1): "Hola" for i in range(5)}}
-
-    mock_provider.generate_json.side_effect = side_effect
+    mock_provider.generate_json.side_effect = _hola_by_batch_size
 
     res = await_translate_subtitles(subs, 'es')
     assert len(res) == 30
     assert res[0]['translatedText'] == 'Hola'
     assert res[29]['translatedText'] == 'Hola'
+    prompts = [c.kwargs.get('prompt', '') for c in mock_provider.generate_json.call_args_list]
+    assert any("(1 to 25)" in p for p in prompts)
+
+
+def test_fake_provider_reset_restores_attributes(fake_provider):
+    fake_provider.concurrency_limit = 1
+    fake_provider.provider_name = "other"
+    fake_provider.generate_json.return_value = {"translations": {}}
+
+    fake_provider.reset()
+
+    assert fake_provider.concurrency_limit == 3
+    assert fake_provider.provider_name == "mock_provider"
+    assert fake_provider.default_model == "mock-model"
+    assert fake_provider.generate_json.return_value != {"translations": {}}
@@ -1,13 +1,28 @@
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock, patch
 from backend.services.translation_service import (
     parse_vtt_to_json3,
+    iter_vtt_events,
     await_translate_subtitles,
     translate_subtitles_simple,
     parse_numbered_translations,
-    align_translations_to_subtitles
+    align_translations_to_subtitles,
+    _extract_raw_translations
 )
 
+def _vtt_ts(seconds):
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.000"
+
+
+_BIG_VTT = "WEBVTT\n\n" + "\n\n".join(
+    f"{_vtt_ts(i)} --> {_vtt_ts(i + 1)}\nLine {i}" for i in range(10000)
+)
+
+
 def test_parse_vtt_to_json3():
     vtt_content = """WEBVTT
 
@@ -30,19 +45,38 @@ This is a test logic
     assert events[1]['dDurationMs'] == 1500
     assert events[1]['segs'][0]['utf8'] == "This is a test logic"
 
-@pytest.fixture
-def mock_provider():
-    mock = MagicMock()
-    mock.concurrency_limit = 3
-    mock.provider_name = "mock_provider"
-    mock.default_model = "mock-model"
-    return mock
 
-@pytest.fixture
-def mock_get_llm_provider(mock_provider):
-    # Patch the factory function where it is defined
-    with patch('backend.services.llm.factory.get_llm_provider', return_value=mock_provider) as mock:
-        yield mock
+@pytest.mark.parametrize("body, expected", [
+    ("First line\nSecond line\n\n", ["First line\nSecond line"]),
+    ("Trailing newline\n", ["Trailing newline"]),
+    ("No newline at end", ["No newline at end"]),
+    ("One\n\n\n\n00:00:02.000 --> 00:00:03.000\nTwo", ["One", "Two"]),
+])
+def test_parse_vtt_to_json3_cue_body_boundaries(body, expected):
+    result = parse_vtt_to_json3("WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n" + body)
+    assert [e['segs'][0]['utf8'] for e in result['events']] == expected
+
+
+def test_iter_vtt_events_is_lazy():
+    events = iter_vtt_events(_BIG_VTT)
+
+    first = next(events)
+    assert first['tStartMs'] == 0
+    assert first['segs'][0]['utf8'] == "Line 0"
+    assert next(events)['tStartMs'] == 1000
+
+
+def test_parse_vtt_to_json3_large_input():
+    start = time.perf_counter()
+    result = parse_vtt_to_json3(_BIG_VTT)
+    elapsed = time.perf_counter() - start
+
+    events = result['events']
+    assert len(events) == 10000
+    assert events[-1]['tStartMs'] == 9999 * 1000
+    assert events[-1]['dDurationMs'] == 1000
+    assert events[-1]['segs'][0]['utf8'] == "Line 9999"
+    assert elapsed < 0.5  # ~50ms locally; generous bound for slow CI runners
 
 def test_translate_subtitles_simple():
     # Patch OpenAIProvider at its source
@@ -74,6 +108,33 @@ def test_translate_subtitles_simple():
         mock_instance.generate_json.assert_called_once()
 
 
+def test_translate_subtitles_simple_reuses_cached_lines():
+    with patch('backend.services.llm.openai_provider.OpenAIProvider') as MockProviderClass, \
+         patch('backend.services.translation_service.supports_json_mode', return_value=True):
+        mock_instance = MockProviderClass.return_value
+        kwargs = dict(source_lang='en', target_lang='es', model_id='gpt-3.5-turbo', api_key='fake-key')
+
+        mock_instance.generate_json.return_value = {"translations": {"1": "Hola", "2": "Mundo"}}
+        translate_subtitles_simple(subtitles=[{'text': 'Hello'}, {'text': 'World'}], **kwargs)
+
+        # Only the unseen line is sent on the next request
+        mock_instance.generate_json.return_value = {"translations": {"1": "Adios"}}
+        result = translate_subtitles_simple(
+            subtitles=[{'text': 'World'}, {'text': 'Bye'}, {'text': 'Hello'}], **kwargs
+        )
+
+        assert result['translations'] == ["Mundo", "Adios", "Hola"]
+        prompt = mock_instance.generate_json.call_args.kwargs['prompt']
+        assert "1. Bye" in prompt
+        assert "Hello" not in prompt and "World" not in prompt
+
+        # Fully cached requests never reach the provider
+        mock_instance.generate_json.reset_mock()
+        result = translate_subtitles_simple(subtitles=[{'text': 'Hello'}], **kwargs)
+        assert result['translations'] == ["Hola"]
+        mock_instance.generate_json.assert_not_called()
+
+
 def test_await_translate_subtitles(mock_get_llm_provider, mock_provider, mock_cache_dir):
     # Setup mock provider response with numbered dict format
     mock_provider.generate_json.return_value = {
@@ -98,51 +159,98 @@ def test_await_translate_subtitles(mock_get_llm_provider, mock_provider, mock_ca
         mock_provider.generate_json.assert_called()
 
 
-# ============================================================================
-# Tests for parse_numbered_translations
-# ============================================================================
+def test_await_translate_subtitles_sends_repeated_lines_once(mock_get_llm_provider, mock_provider):
+    mock_provider.generate_json.return_value = {
+        "translations": {"1": "[Musique]", "2": "Bonjour"}
+    }
+    subtitles = [
+        {'start': 0, 'end': 1000, 'text': '[Music]'},
+        {'start': 1000, 'end': 2000, 'text': 'Hello'},
+        {'start': 2000, 'end': 3000, 'text': '[Music]'},
+    ]
 
-class TestParseNumberedTranslations:
-    """Tests for parse_numbered_translations function."""
+    with patch.dict('sys.modules', {'backend.utils.translation_quality': MagicMock()}):
+        updated_subs = await_translate_subtitles(subtitles, 'fr')
 
-    def test_dict_with_string_keys(self):
-        """Parse dict with string number keys."""
-        response = {"1": "Hello", "2": "World", "3": "Foo"}
-        result = parse_numbered_translations(response, 3)
-        assert result == [(1, "Hello"), (2, "World"), (3, "Foo")]
+    assert [s['translatedText'] for s in updated_subs] == ["[Musique]", "Bonjour", "[Musique]"]
+    prompt = mock_provider.generate_json.call_args.kwargs['prompt']
+    assert "1. [Music]\n2. Hello\n</subtitles>" in prompt
 
-    def test_dict_with_int_keys(self):
-        """Parse dict with integer keys."""
-        response = {1: "Hello", 2: "World"}
-        result = parse_numbered_translations(response, 2)
-        assert result == [(1, "Hello"), (2, "World")]
 
-    def test_array_with_numbered_text(self):
-        """Parse array where items have leading numbers."""
-        response = ["1. Hello", "2. World", "3. Foo"]
-        result = parse_numbered_translations(response, 3)
-        assert result == [(1, "Hello"), (2, "World"), (3, "Foo")]
+def test_translate_batch_dedupes_repeated_lines(mock_get_llm_provider, mock_provider):
+    """A batch of A, B, A is translated from a two-line prompt and fills all three subtitles."""
+    mock_provider.generate_json.return_value = {"translations": {"1": "A-fr", "2": "B-fr"}}
+    subtitles = [{'start': i * 1000, 'end': i * 1000 + 900, 'text': text} for i, text in enumerate(['A', 'B', 'A'])]
 
-    def test_array_with_various_separators(self):
-        """Parse array with different number separators (. ) :)."""
-        response = ["1. Hello", "2) World", "3: Foo"]
-        result = parse_numbered_translations(response, 3)
-        assert result == [(1, "Hello"), (2, "World"), (3, "Foo")]
+    with patch.dict('sys.modules', {'backend.utils.translation_quality': MagicMock()}):
+        updated_subs = await_translate_subtitles(subtitles, 'fr')
+
+    mock_provider.generate_json.assert_called_once()
+    prompt = mock_provider.generate_json.call_args.kwargs['prompt']
+    lines = prompt.split("<subtitles>\n", 1)[1].split("\n</subtitles>", 1)[0].splitlines()
+    assert lines == ["1. A", "2. B"]
+    assert "(1 to 2)" in prompt
+    assert [s['translatedText'] for s in updated_subs] == ["A-fr", "B-fr", "A-fr"]
+
+
+def test_await_translate_subtitles_runs_batches_concurrently(mock_get_llm_provider, mock_provider):
+    """All batches up to provider.concurrency_limit are in flight at once."""
+    mock_provider.concurrency_limit = 3
+    # Breaks (and fails every batch) unless three generate_json calls overlap
+    barrier = threading.Barrier(3, timeout=5)
+
+    def generate_json(**kwargs):
+        barrier.wait()
+        return {"translations": {str(i): f"Ligne traduite {i}" for i in range(1, 26)}}
+
+    mock_provider.generate_json.side_effect = generate_json
+    subtitles = [{'start': i * 1000, 'end': i * 1000 + 900, 'text': f'Line {i}'} for i in range(75)]
+
+    with patch.dict('sys.modules', {'backend.utils.translation_quality': MagicMock()}):
+        updated_subs = await_translate_subtitles(subtitles, 'fr')
+
+    assert not barrier.broken
+    assert mock_provider.generate_json.call_count == 3
+    assert all(s['translatedText'] for s in updated_subs)
 
-    def test_plain_array_fallback(self):
-        """Parse plain array without numbers - fallback to position."""
-        response = ["Hello", "World", "Foo"]
-        result = parse_numbered_translations(response, 3)
-        assert result == [(1, "Hello"), (2, "World"), (3, "Foo")]
 
-    def test_empty_response(self):
-        """Handle empty response."""
-        assert parse_numbered_translations({}, 3) == []
-        assert parse_numbered_translations([], 3) == []
+# ============================================================================
+# Tests for parse_numbered_translations
+# ============================================================================
+
+class TestParseNumberedTranslations:
+    """Tests for parse_numbered_translations function."""
+
+    @pytest.mark.parametrize("response,expected_count,expected", [
+        # Dict with string number keys
+        ({"1": "Hello", "2": "World", "3": "Foo"}, 3, [(1, "Hello"), (2, "World"), (3, "Foo")]),
+        # Dict with integer keys
+        ({1: "Hello", 2: "World"}, 2, [(1, "Hello"), (2, "World")]),
+        # Array where items have leading numbers
+        (["1. Hello", "2. World", "3. Foo"], 3, [(1, "Hello"), (2, "World"), (3, "Foo")]),
+        # Array with different number separators (. ) :)
+        (["1. Hello", "2) World", "3: Foo"], 3, [(1, "Hello"), (2, "World"), (3, "Foo")]),
+        # Plain array without numbers - fallback to position
+        (["Hello", "World", "Foo"], 3, [(1, "Hello"), (2, "World"), (3, "Foo")]),
+        # Empty responses
+        ({}, 3, []),
+        ([], 3, []),
+        # Result sorted by number
+        ({"3": "Three", "1": "One", "2": "Two"}, 3, [(1, "One"), (2, "Two"), (3, "Three")]),
+        # Whitespace in values is stripped
+        ({"1": "  Hello  ", "2": "World"}, 2, [(1, "Hello"), (2, "World")]),
+        # Invalid keys are skipped
+        ({"1": "Hello", "abc": "Invalid", "2": "World"}, 2, [(1, "Hello"), (2, "World")]),
+        # None values become empty strings
+        ({"1": "Hello", "2": None}, 2, [(1, "Hello"), (2, "")]),
+        # Numeric-leading text (e.g., year) is not treated as a line number
+        (["2025 will be better", "2. Mundo"], 2, [(1, "2025 will be better"), (2, "Mundo")]),
+    ])
+    def test_parse_numbered(self, response, expected_count, expected):
+        assert parse_numbered_translations(response, expected_count) == expected
 
     def test_duplicate_numbers_keeps_first(self):
         """Duplicate numbers keep first occurrence."""
-        response = {"1": "First", "2": "Second"}
         # Can't have true duplicates in dict, test with array
         response = ["1. First", "1. Duplicate", "2. Second"]
         result = parse_numbered_translations(response, 3)
@@ -151,111 +259,60 @@ class TestParseNumberedTranslations:
         assert (2, "Second") in result
         assert len([r for r in result if r[0] == 1]) == 1  # Only one entry for number 1
 
-    def test_sorted_by_number(self):
-        """Result should be sorted by number."""
-        response = {"3": "Three", "1": "One", "2": "Two"}
-        result = parse_numbered_translations(response, 3)
-        assert result == [(1, "One"), (2, "Two"), (3, "Three")]
-
-    def test_handles_whitespace(self):
-        """Handles whitespace in values."""
-        response = {"1": "  Hello  ", "2": "World"}
-        result = parse_numbered_translations(response, 2)
-        assert result == [(1, "Hello"), (2, "World")]
 
-    def test_invalid_key_skipped(self):
-        """Invalid keys are skipped."""
-        response = {"1": "Hello", "abc": "Invalid", "2": "World"}
-        result = parse_numbered_translations(response, 2)
-        assert result == [(1, "Hello"), (2, "World")]
-
-    def test_none_value_becomes_empty_string(self):
-        """None values become empty strings."""
-        response = {"1": "Hello", "2": None}
-        result = parse_numbered_translations(response, 2)
-        assert result == [(1, "Hello"), (2, "")]
+# ============================================================================
+# Tests for _extract_raw_translations
+# ============================================================================
 
-    def test_numeric_leading_text_not_misparsed_as_number(self):
-        """Numeric-leading text (e.g., year) should not be treated as a line number."""
-        response = ["2025 will be better", "2. Mundo"]
-        result = parse_numbered_translations(response, 2)
-        assert result == [(1, "2025 will be better"), (2, "Mundo")]
+@pytest.mark.parametrize("json_response,expected", [
+    ({"translations": {"1": "Hola"}}, {"1": "Hola"}),
+    (["1. Hola"], ["1. Hola"]),
+    # Known alternate keys win over other collections
+    ({"meta": ["x"], "results": ["Hola"]}, ["Hola"]),
+    # Otherwise the first non-empty collection is used
+    ({"note": "ok", "empty": [], "lines": ["Hola"]}, ["Hola"]),
+    ({"note": "ok"}, None),
+    ("not-a-dict", None),
+    (None, None),
+])
+def test_extract_raw_translations(json_response, expected):
+    assert _extract_raw_translations(json_response) == expected
 
 
 # ============================================================================
 # Tests for align_translations_to_subtitles
 # ============================================================================
 
+def _subs(n):
+    return [{'text': chr(ord('a') + i)} for i in range(n)]
+
+
 class TestAlignTranslationsToSubtitles:
     """Tests for align_translations_to_subtitles function."""
 
-    def test_basic_alignment(self):
-        """Basic 1-to-1 alignment."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}]
-        parsed = [(1, "A"), (2, "B"), (3, "C")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A", 1: "B", 2: "C"}
-
-    def test_skipped_number_leaves_gap(self):
-        """Skipped number (1, 2, 4) leaves gap."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}, {'text': 'd'}]
-        parsed = [(1, "A"), (2, "B"), (4, "D")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A", 1: "B", 3: "D"}
-        assert 2 not in result  # Gap at index 2
-
-    def test_extra_translations_ignored(self):
-        """Extra translations beyond expected count are ignored."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}]
-        parsed = [(1, "A"), (2, "B"), (3, "C"), (4, "D")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A", 1: "B"}
-
-    def test_fewer_translations_partial_fill(self):
-        """Fewer translations than expected fills partially."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}]
-        parsed = [(1, "A")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A"}
-        assert 1 not in result
-        assert 2 not in result
-
-    def test_offset_detection_and_adjustment(self):
-        """Detect and adjust offset (5, 6, 7 instead of 1, 2, 3)."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}]
-        parsed = [(5, "A"), (6, "B"), (7, "C")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        # Offset 4 detected, numbers adjusted to 1, 2, 3
-        assert result == {0: "A", 1: "B", 2: "C"}
-
-    def test_empty_parsed_translations(self):
-        """Empty parsed translations returns empty dict."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}]
-        result = align_translations_to_subtitles(subtitles, [])
-        assert result == {}
-
-    def test_out_of_range_numbers_ignored(self):
-        """Numbers outside valid range are ignored."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}]
-        parsed = [(0, "Zero"), (1, "A"), (2, "B"), (100, "Far")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A", 1: "B"}  # 0 and 100 ignored (0-indexed means 1->0, 2->1)
-
-    def test_partial_offset_detection(self):
-        """Partial offset when 80%+ of numbers match expected offset pattern."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}, {'text': 'd'}, {'text': 'e'}]
-        # Numbers 10, 11, 12, 13, 14 (offset of 9)
-        parsed = [(10, "A"), (11, "B"), (12, "C"), (13, "D"), (14, "E")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {0: "A", 1: "B", 2: "C", 3: "D", 4: "E"}
-
-    def test_missing_first_number_does_not_shift_alignment(self):
-        """If first line is missing (2,3,4), keep the gap instead of shifting all lines."""
-        subtitles = [{'text': 'a'}, {'text': 'b'}, {'text': 'c'}, {'text': 'd'}]
-        parsed = [(2, "B"), (3, "C"), (4, "D")]
-        result = align_translations_to_subtitles(subtitles, parsed)
-        assert result == {1: "B", 2: "C", 3: "D"}
-        assert 0 not in result
+    @pytest.mark.parametrize("count,parsed,expected", [
+        # Basic 1-to-1 alignment
+        (3, [(1, "A"), (2, "B"), (3, "C")], {0: "A", 1: "B", 2: "C"}),
+        # Skipped number (1, 2, 4) leaves gap at index 2
+        (4, [(1, "A"), (2, "B"), (4, "D")], {0: "A", 1: "B", 3: "D"}),
+        # Extra translations beyond expected count are ignored
+        (2, [(1, "A"), (2, "B"), (3, "C"), (4, "D")], {0: "A", 1: "B"}),
+        # Fewer translations than expected fills partially
+        (3, [(1, "A")], {0: "A"}),
+        # Offset detected and adjusted (5, 6, 7 instead of 1, 2, 3)
+        (3, [(5, "A"), (6, "B"), (7, "C")], {0: "A", 1: "B", 2: "C"}),
+        # Empty parsed translations returns empty dict
+        (2, [], {}),
+        # Numbers outside valid range are ignored (0 and 100)
+        (2, [(0, "Zero"), (1, "A"), (2, "B"), (100, "Far")], {0: "A", 1: "B"}),
+        # Offset of 9 detected when all numbers match the pattern
+        (5, [(10, "A"), (11, "B"), (12, "C"), (13, "D"), (14, "E")],
+         {0: "A", 1: "B", 2: "C", 3: "D", 4: "E"}),
+        # Missing first line (2, 3, 4) keeps the gap instead of shifting
+        (4, [(2, "B"), (3, "C"), (4, "D")], {1: "B", 2: "C", 3: "D"}),
+    ])
+    def test_align(self, count, parsed, expected):
+        assert align_translations_to_subtitles(_subs(count), parsed) == expected
 
 
 # ============================================================================
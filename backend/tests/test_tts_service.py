@@ -5,8 +5,23 @@ Unit tests for TTS service
 import pytest
 import os
 import tempfile
+import asyncio
+import threading
 from unittest.mock import patch, MagicMock, AsyncMock
 
+from backend.services import tts_service
+from backend.services.tts_service import (
+    DEFAULT_VOICES,
+    _cache_audio,
+    clear_tts_cache,
+    generate_tts,
+    get_available_voices,
+    get_cache_key,
+    get_cached_audio,
+    get_tts_status,
+    is_cached,
+)
+
 
 @pytest.fixture
 def mock_tts_cache_dir(tmp_path):
@@ -19,14 +34,14 @@ def mock_tts_cache_dir(tmp_path):
 @pytest.fixture
 def mock_tts_enabled():
     """Enable TTS for testing."""
-    with patch('backend.services.tts_service.TTS_ENABLED', True):
+    with patch.object(tts_service, 'TTS_ENABLED', True):
         yield
 
 
 @pytest.fixture
 def mock_tts_disabled():
     """Disable TTS for testing."""
-    with patch('backend.services.tts_service.TTS_ENABLED', False):
+    with patch.object(tts_service, 'TTS_ENABLED', False):
         yield
 
 
@@ -34,18 +49,14 @@ class TestCacheKey:
     """Test cache key generation."""
 
     def test_get_cache_key_basic(self):
-        from backend.services.tts_service import get_cache_key
-
         key1 = get_cache_key("Hello world", "en")
         key2 = get_cache_key("Hello world", "en")
 
         # Same input should produce same key
         assert key1 == key2
-        assert len(key1) == 16  # SHA256 truncated to 16 chars
+        assert len(key1) == 16  # 8-byte BLAKE2b digest as hex
 
     def test_get_cache_key_different_text(self):
-        from backend.services.tts_service import get_cache_key
-
         key1 = get_cache_key("Hello", "en")
         key2 = get_cache_key("World", "en")
 
@@ -53,8 +64,6 @@ class TestCacheKey:
         assert key1 != key2
 
     def test_get_cache_key_different_lang(self):
-        from backend.services.tts_service import get_cache_key
-
         key1 = get_cache_key("Hello", "en")
         key2 = get_cache_key("Hello", "ja")
 
@@ -62,8 +71,6 @@ class TestCacheKey:
         assert key1 != key2
 
     def test_get_cache_key_different_voice(self):
-        from backend.services.tts_service import get_cache_key
-
         key1 = get_cache_key("Hello", "en", "en-US-AriaNeural")
         key2 = get_cache_key("Hello", "en", "en-US-GuyNeural")
 
@@ -71,37 +78,33 @@ class TestCacheKey:
         assert key1 != key2
 
 
+    def test_get_cache_key_region_variant_uses_base_language_voice(self):
+        # es-MX has no entry of its own; key must match the voice generate_tts will use
+        assert get_cache_key("Hola", "es-MX") == get_cache_key("Hola", "es-MX", DEFAULT_VOICES['es'])
+        assert get_cache_key("Hola", "xx") == get_cache_key("Hola", "xx", DEFAULT_VOICES['en'])
+
+
 class TestCaching:
     """Test TTS caching functionality."""
 
     def test_is_cached_false_when_not_exists(self, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import is_cached
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             assert is_cached("Test text", "en") is False
 
     def test_is_cached_true_when_exists(self, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import (
-                is_cached, get_cache_key, get_cache_path, _cache_audio
-            )
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             # Create a cached file
             _cache_audio(b"fake audio data", "Test text", "en")
 
             assert is_cached("Test text", "en") is True
 
     def test_get_cached_audio_returns_none_when_not_cached(self, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import get_cached_audio
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             result = get_cached_audio("Test text", "en")
             assert result is None
 
     def test_get_cached_audio_returns_bytes_when_cached(self, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import get_cached_audio, _cache_audio
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             # Cache some audio
             audio_data = b"fake audio content"
             _cache_audio(audio_data, "Test text", "en")
@@ -111,18 +114,25 @@ class TestCaching:
             assert result == audio_data
 
 
+    def test_cache_audio_round_trips_binary_blob(self, mock_tts_cache_dir):
+        audio_data = bytes(range(256)) * 1024  # 256KB including \r, \n and NUL bytes
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            path = _cache_audio(audio_data, "Long text", "en")
+            _cache_audio(b"short", "Long text", "en")  # Overwrite truncates
+
+            assert os.path.getsize(path) == 5
+            _cache_audio(audio_data, "Long text", "en")
+            assert get_cached_audio("Long text", "en") == audio_data
+
+
 class TestGenerateTTS:
     """Test TTS generation."""
 
     def test_generate_tts_raises_when_disabled(self, mock_tts_disabled):
-        from backend.services.tts_service import generate_tts
-
         with pytest.raises(RuntimeError, match="TTS is disabled"):
             generate_tts("Hello", "en")
 
     def test_generate_tts_raises_on_empty_text(self, mock_tts_enabled):
-        from backend.services.tts_service import generate_tts
-
         with pytest.raises(ValueError, match="Text cannot be empty"):
             generate_tts("", "en")
 
@@ -130,15 +140,13 @@ class TestGenerateTTS:
             generate_tts("   ", "en")
 
     def test_generate_tts_uses_cache(self, mock_tts_cache_dir, mock_tts_enabled):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import generate_tts, _cache_audio
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             # Pre-cache some audio
             cached_audio = b"cached audio content"
             _cache_audio(cached_audio, "Hello world", "en")
 
             # Should return cached audio without calling TTS backend
-            with patch('backend.services.tts_service._generate_edge_tts') as mock_edge:
+            with patch.object(tts_service, '_generate_edge_tts') as mock_edge:
                 result, content_type = generate_tts("Hello world", "en")
 
                 mock_edge.assert_not_called()
@@ -146,35 +154,61 @@ class TestGenerateTTS:
                 assert content_type == 'audio/mpeg'
 
     def test_generate_tts_with_edge_tts(self, mock_tts_cache_dir, mock_tts_enabled):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            with patch('backend.services.tts_service.TTS_BACKEND', 'edge-tts'):
-                from backend.services.tts_service import generate_tts
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
                 fake_audio = b"fake edge-tts audio"
 
                 # Mock the async edge-tts call
                 async def mock_edge_tts(text, voice):
                     return fake_audio
 
-                with patch('backend.services.tts_service._generate_edge_tts', side_effect=mock_edge_tts):
+                with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_tts):
                     result, content_type = generate_tts("Test", "en", use_cache=False)
 
                     assert result == fake_audio
                     assert content_type == 'audio/mpeg'
 
-    def test_generate_tts_falls_back_to_gtts(self, mock_tts_cache_dir, mock_tts_enabled):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            with patch('backend.services.tts_service.TTS_BACKEND', 'edge-tts'):
-                from backend.services.tts_service import generate_tts
+    def test_generate_tts_reuses_one_background_loop(self, mock_tts_enabled):
+        with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
+            seen = []
+
+            async def mock_edge_tts(text, voice):
+                seen.append((asyncio.get_running_loop(), threading.current_thread()))
+                return b"audio"
+
+            with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_tts):
+                generate_tts("One", "en", use_cache=False)
+                generate_tts("Two", "en", use_cache=False)
+
+            (loop1, thread1), (loop2, thread2) = seen
+            assert loop1 is loop2
+            assert thread1 is thread2 is not threading.main_thread()
+
+    def test_generate_tts_falls_back_to_gtts_on_timeout(self, mock_tts_enabled):
+        with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'), \
+             patch.object(tts_service, 'EDGE_TTS_TIMEOUT_SECONDS', 0.05):
 
+            async def mock_edge_hang(text, voice):
+                await asyncio.sleep(10)
+
+            with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_hang), \
+                 patch.object(tts_service, '_generate_gtts', return_value=b"gtts") as mock_gtts:
+                result, _ = generate_tts("Test", "en", use_cache=False)
+
+            assert result == b"gtts"
+            mock_gtts.assert_called_once()
+
+    def test_generate_tts_falls_back_to_gtts(self, mock_tts_cache_dir, mock_tts_enabled):
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
                 gtts_audio = b"fake gtts audio"
 
                 # Make edge-tts fail
                 async def mock_edge_fail(text, voice):
                     raise Exception("edge-tts failed")
 
-                with patch('backend.services.tts_service._generate_edge_tts', side_effect=mock_edge_fail):
-                    with patch('backend.services.tts_service._generate_gtts', return_value=gtts_audio) as mock_gtts:
+                with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_fail):
+                    with patch.object(tts_service, '_generate_gtts', return_value=gtts_audio) as mock_gtts:
                         result, content_type = generate_tts("Test", "en", use_cache=False)
 
                         mock_gtts.assert_called_once()
@@ -185,9 +219,7 @@ class TestGetAvailableVoices:
     """Test voice listing."""
 
     def test_get_available_voices_gtts_backend(self):
-        with patch('backend.services.tts_service.TTS_BACKEND', 'gtts'):
-            from backend.services.tts_service import get_available_voices
-
+        with patch.object(tts_service, 'TTS_BACKEND', 'gtts'):
             voices = get_available_voices('en')
 
             assert len(voices) == 1
@@ -195,9 +227,7 @@ class TestGetAvailableVoices:
 
     def test_get_available_voices_fallback_on_error(self):
         """Test that get_available_voices returns defaults when edge-tts fails."""
-        with patch('backend.services.tts_service.TTS_BACKEND', 'edge-tts'):
-            from backend.services.tts_service import get_available_voices, DEFAULT_VOICES
-
+        with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
             # When edge-tts import or call fails, should return default voices
             voices = get_available_voices('en')
 
@@ -207,14 +237,37 @@ class TestGetAvailableVoices:
             assert any(v['id'] == DEFAULT_VOICES['en'] for v in voices)
 
 
+    def test_get_available_voices_fetches_manifest_once(self):
+        manifest = [
+            {'Locale': 'en-US', 'ShortName': 'en-US-AriaNeural', 'FriendlyName': 'Aria', 'Gender': 'Female'},
+            {'Locale': 'ja-JP', 'ShortName': 'ja-JP-NanamiNeural', 'FriendlyName': 'Nanami', 'Gender': 'Female'},
+        ]
+        fake_edge_tts = MagicMock()
+        fake_edge_tts.list_voices = AsyncMock(return_value=manifest)
+
+        with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'), \
+             patch.object(tts_service, '_voice_manifest', None), \
+             patch.dict('sys.modules', {'edge_tts': fake_edge_tts}):
+            en_voices = get_available_voices('en')
+            ja_voices = get_available_voices('ja')
+            all_voices = get_available_voices()
+
+            assert [v['id'] for v in en_voices] == ['en-US-AriaNeural']
+            assert [v['id'] for v in ja_voices] == ['ja-JP-NanamiNeural']
+            assert len(all_voices) == 2
+            fake_edge_tts.list_voices.assert_awaited_once()
+
+            # Expired manifest is refetched
+            with patch.object(tts_service, 'VOICE_LIST_TTL_SECONDS', -1):
+                get_available_voices('en')
+            assert fake_edge_tts.list_voices.await_count == 2
+
 class TestGetTTSStatus:
     """Test status endpoint."""
 
     def test_get_tts_status(self, mock_tts_enabled, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            with patch('backend.services.tts_service.TTS_BACKEND', 'edge-tts'):
-                from backend.services.tts_service import get_tts_status
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
                 status = get_tts_status()
 
                 assert status['enabled'] is True
@@ -227,9 +280,7 @@ class TestClearCache:
     """Test cache clearing."""
 
     def test_clear_tts_cache(self, mock_tts_cache_dir):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            from backend.services.tts_service import clear_tts_cache, _cache_audio
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
             # Create some cached files
             _cache_audio(b"audio1", "text1", "en")
             _cache_audio(b"audio2", "text2", "en")
@@ -244,12 +295,25 @@ class TestClearCache:
             assert len(files) == 0
 
 
+    def test_clear_tts_cache_only_removes_mp3_files(self, mock_tts_cache_dir):
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            for i in range(40):
+                _cache_audio(b"audio", f"text{i}", "en")
+            open(os.path.join(mock_tts_cache_dir, 'notes.txt'), 'w').close()
+            os.mkdir(os.path.join(mock_tts_cache_dir, 'nested.mp3'))
+
+            assert clear_tts_cache() == 40
+            assert sorted(os.listdir(mock_tts_cache_dir)) == ['nested.mp3', 'notes.txt']
+
+    def test_clear_tts_cache_empty_dir(self, mock_tts_cache_dir):
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            assert clear_tts_cache() == 0
+
+
 class TestDefaultVoices:
     """Test default voice selection."""
 
     def test_default_voices_coverage(self):
-        from backend.services.tts_service import DEFAULT_VOICES
-
         # Common languages should have defaults
         assert 'en' in DEFAULT_VOICES
         assert 'es' in DEFAULT_VOICES
@@ -259,10 +323,8 @@ class TestDefaultVoices:
         assert 'zh-CN' in DEFAULT_VOICES
 
     def test_generate_tts_uses_default_voice_for_lang(self, mock_tts_cache_dir, mock_tts_enabled):
-        with patch('backend.services.tts_service.TTS_CACHE_DIR', mock_tts_cache_dir):
-            with patch('backend.services.tts_service.TTS_BACKEND', 'edge-tts'):
-                from backend.services.tts_service import DEFAULT_VOICES
-
+        with patch.object(tts_service, 'TTS_CACHE_DIR', mock_tts_cache_dir):
+            with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
                 fake_audio = b"audio"
 
                 async def mock_edge_tts(text, voice):
@@ -270,6 +332,19 @@ class TestDefaultVoices:
                     assert voice == DEFAULT_VOICES['ja']
                     return fake_audio
 
-                with patch('backend.services.tts_service._generate_edge_tts', side_effect=mock_edge_tts):
-                    from backend.services.tts_service import generate_tts
+                with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_tts):
                     generate_tts("Hello", "ja", use_cache=False)
+
+    @pytest.mark.parametrize("lang,expected_lang", [("pt-PT", "pt"), ("zh-CN", "zh-CN"), ("xx", "en")])
+    def test_generate_tts_voice_fallback_chain(self, lang, expected_lang, mock_tts_enabled):
+        with patch.object(tts_service, 'TTS_BACKEND', 'edge-tts'):
+            voices = []
+
+            async def mock_edge_tts(text, voice):
+                voices.append(voice)
+                return b"audio"
+
+            with patch.object(tts_service, '_generate_edge_tts', side_effect=mock_edge_tts):
+                generate_tts("Hello", lang, use_cache=False)
+
+            assert voices == [DEFAULT_VOICES[expected_lang]]
@@ -1,5 +1,6 @@
 import os
 import pytest
+from unittest.mock import patch
 from backend.utils.file_utils import get_cache_path, validate_audio_file
 from backend.utils.model_utils import get_model_context_size
 from backend.services.translation_service import format_eta, estimate_translation_time
@@ -13,6 +14,21 @@ def test_get_cache_path(mock_cache_dir):
     path = get_cache_path("video123", suffix="audio", cache_dir=mock_cache_dir)
     assert path == os.path.join(mock_cache_dir, "video123_audio.json")
 
+@pytest.mark.parametrize("video_id", ["", "../etc", "a/b", "vid\n", "vïd", "a" * 129])
+def test_get_cache_path_rejects_unsafe_ids(mock_cache_dir, video_id):
+    with pytest.raises(ValueError):
+        get_cache_path(video_id, cache_dir=mock_cache_dir)
+
+def test_get_cache_path_accepts_max_length_id(mock_cache_dir):
+    assert get_cache_path("a" * 128, cache_dir=mock_cache_dir).endswith("a" * 128 + "_subtitles.json")
+
+def test_get_cache_path_is_memoized_per_cache_dir(tmp_path):
+    from backend.utils import file_utils
+    first = get_cache_path("video123", cache_dir=str(tmp_path / "a"))
+    with patch.object(file_utils.os.path, 'join', side_effect=AssertionError("rebuilt")):
+        assert get_cache_path("video123", cache_dir=str(tmp_path / "a")) == first
+    assert get_cache_path("video123", cache_dir=str(tmp_path / "b")) == str(tmp_path / "b" / "video123_subtitles.json")
+
 def test_validate_audio_file(tmp_path):
     # Create a dummy file
     d = tmp_path / "subdir"
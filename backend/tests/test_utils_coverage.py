@@ -25,3 +25,16 @@ def test_get_model_context_size_partial():
 
 def test_get_model_context_size_exact():
     assert get_model_context_size("gpt-4") == 8192
+
+def test_get_model_context_size_case_insensitive():
+    # Mixed case resolves like the canonical id (exact match, not an earlier partial)
+    assert get_model_context_size("GPT-4-32K") == get_model_context_size("gpt-4-32k") == 32768
+
+@pytest.mark.parametrize("model,expected", [
+    ("gpt-4-32k-0613", 32768),      # not gpt-4's 8192
+    ("gpt-3.5-turbo-16k-0613", 16385),
+    ("mistral-large-2411", 128000),  # not mistral's 32768
+    ("llama-3.1-70b-instruct", 128000),
+])
+def test_get_model_context_size_prefers_longest_key(model, expected):
+    assert get_model_context_size(model) == expected
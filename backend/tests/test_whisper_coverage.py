@@ -1,5 +1,6 @@
 import sys
 import types
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch
 import backend.services.whisper_service as ws
@@ -26,6 +27,25 @@ def test_whisper_backend_detection_openai_whisper():
          patch.dict(sys.modules, {'whisper': MagicMock()}):
         assert ws.get_whisper_backend() == 'openai-whisper'
 
+@pytest.mark.parametrize("system,machine", [('Linux', 'x86_64'), ('Windows', 'AMD64')])
+def test_whisper_backend_detection_faster_whisper(system, machine):
+    reset_backend()
+    with patch('platform.system', return_value=system), \
+         patch('platform.machine', return_value=machine), \
+         patch.dict(sys.modules, {'mlx_whisper': None, 'faster_whisper': MagicMock()}):
+        assert ws.get_whisper_backend() == 'faster-whisper'
+    reset_backend()
+
+@pytest.mark.parametrize("cuda_devices,expected", [(1, 'cuda'), (0, 'cpu')])
+def test_get_whisper_device_faster_whisper(cuda_devices, expected):
+    fake_ct2 = MagicMock()
+    fake_ct2.get_cuda_device_count.return_value = cuda_devices
+    with patch('backend.services.whisper_service.get_whisper_backend', return_value='faster-whisper'), \
+         patch('backend.services.whisper_service._ensure_torch') as mock_ensure_torch, \
+         patch.dict(sys.modules, {'ctranslate2': fake_ct2}):
+        assert ws.get_whisper_device() == expected
+        mock_ensure_torch.assert_not_called()
+
 def test_get_whisper_device_cuda():
     mock_torch = MagicMock()
     mock_torch.cuda.is_available.return_value = True
@@ -72,3 +92,193 @@ def test_get_diarization_pipeline_load_fail():
          patch('backend.services.whisper_service._ensure_torch', return_value=mock_torch), \
          patch.dict(sys.modules, {'pyannote': fake_pyannote, 'pyannote.audio': fake_pyannote_audio}):
         assert ws.get_diarization_pipeline() is None
+
+def test_ensure_torch_imports_and_patches_once():
+    fake_torch = types.ModuleType('torch')
+    fake_serialization = types.ModuleType('torch.serialization')
+    fake_torch.serialization = fake_serialization
+    fake_torch.load = MagicMock()
+    fake_torch.set_num_threads = MagicMock()
+    fake_torch.set_num_interop_threads = MagicMock()
+
+    with patch.object(ws, '_torch', None), \
+         patch.dict(sys.modules, {'torch': fake_torch, 'torch.serialization': fake_serialization}):
+        assert ws._ensure_torch() is fake_torch
+        # Later calls reuse the patched module without re-running the setup
+        assert ws._ensure_torch() is fake_torch
+        fake_torch.set_num_threads.assert_called_once()
+
+def test_mlx_device_does_not_load_torch():
+    with patch('backend.services.whisper_service.get_whisper_backend', return_value='mlx-whisper'), \
+         patch('backend.services.whisper_service._ensure_torch') as mock_ensure_torch:
+        assert ws.get_whisper_device() == 'metal'
+        mock_ensure_torch.assert_not_called()
+
+def _turn(start, end, speaker):
+    return (MagicMock(start=start, end=end), None, speaker)
+
+def test_best_speaker_sums_overlap_per_speaker():
+    index = ws._build_turn_index([
+        _turn(0.0, 1.0, 'A'),
+        _turn(1.0, 2.0, 'B'),
+        _turn(2.0, 2.8, 'A'),
+    ])
+    # A overlaps 0.5 + 0.8, B overlaps 1.0
+    assert ws._best_speaker(index, 0.5, 3.0) == 'A'
+    assert ws._best_speaker(index, 1.0, 2.0) == 'B'
+
+def test_best_speaker_handles_nested_turns():
+    # A long turn that encloses later, shorter ones: ends are not sorted
+    index = ws._build_turn_index([
+        _turn(0.0, 10.0, 'A'),
+        _turn(1.0, 2.0, 'B'),
+        _turn(3.0, 4.0, 'C'),
+    ])
+    assert ws._best_speaker(index, 5.0, 6.0) == 'A'
+
+def test_best_speaker_defaults_without_overlap():
+    index = ws._build_turn_index([_turn(0.0, 1.0, 'A')])
+    assert ws._best_speaker(index, 2.0, 3.0) == 'SPEAKER_00'
+    assert ws._best_speaker(ws._build_turn_index([]), 0.0, 1.0) == 'SPEAKER_00'
+
+def test_best_speaker_matches_full_scan_on_unsorted_turns():
+    import random
+    rng = random.Random(7)
+    turns = []
+    for _ in range(200):
+        start = rng.uniform(0, 100)
+        turns.append(_turn(start, start + rng.uniform(0.1, 15), rng.choice('ABCD')))
+    index = ws._build_turn_index(turns)
+
+    for _ in range(200):
+        seg_start = rng.uniform(0, 110)
+        seg_end = seg_start + rng.uniform(0.1, 5)
+        totals = {}
+        for turn, _, speaker in turns:
+            overlap = min(seg_end, turn.end) - max(seg_start, turn.start)
+            if overlap > 0:
+                totals[speaker] = totals.get(speaker, 0) + overlap
+        expected = max(totals.values()) if totals else None
+        best = ws._best_speaker(index, seg_start, seg_end)
+        if expected is None:
+            assert best == 'SPEAKER_00'
+        else:
+            assert totals[best] == pytest.approx(expected)
+
+def test_build_turn_index_sorts_only_out_of_order_turns():
+    in_order = [_turn(0.0, 1.0, 'A'), _turn(0.0, 3.0, 'B'), _turn(2.0, 2.5, 'A')]
+    with patch.object(ws.np, 'argsort', wraps=ws.np.argsort) as mock_argsort:
+        starts, ends, reach, codes, labels = ws._build_turn_index(in_order)
+        mock_argsort.assert_not_called()
+    assert starts.tolist() == [0.0, 0.0, 2.0]
+    assert reach.tolist() == [1.0, 3.0, 3.0]
+
+    starts, ends, _, codes, labels = ws._build_turn_index(in_order[::-1])
+    assert starts.tolist() == [0.0, 0.0, 2.0]
+    assert [labels[c] for c in codes] == ['B', 'A', 'A']
+
+def test_best_speakers_matches_per_segment_lookup():
+    index = ws._build_turn_index([
+        _turn(0.0, 10.0, 'A'),
+        _turn(1.0, 2.0, 'B'),
+        _turn(2.5, 6.0, 'B'),
+        _turn(12.0, 14.0, 'C'),
+    ])
+    segments = [{'start': s, 'end': e} for s, e in [(0.0, 1.0), (1.0, 2.0), (2.0, 7.0), (10.5, 11.5), (12.5, 20.0)]]
+    expected = [ws._best_speaker(index, seg['start'], seg['end']) for seg in segments]
+    assert ws._best_speakers(index, segments) == expected == ['A', 'A', 'A', 'SPEAKER_00', 'C']
+    assert ws._best_speakers(index, []) == []
+
+def _greedy_split(starts, ends, seg_end, max_words, max_duration):
+    """Reference: close a chunk at the first word that reaches either limit."""
+    chunks, first = [], None
+    for k in range(len(starts)):
+        if first is None:
+            first = k
+        if k - first + 1 >= max_words or ends[k] - starts[first] >= max_duration:
+            chunks.append((first, k + 1, ends[k]))
+            first = None
+    if first is not None:
+        chunks.append((first, len(starts), seg_end))
+    return chunks
+
+def test_split_words_matches_greedy_split_without_pauses():
+    import random
+    rng = random.Random(3)
+    for _ in range(100):
+        bounds = [0.0]
+        for _ in range(rng.randint(1, 60)):
+            bounds.append(bounds[-1] + rng.uniform(0.05, 1.5))
+        starts, ends = np.array(bounds[:-1]), np.array(bounds[1:])
+        max_words, max_duration = rng.randint(1, 15), rng.uniform(1.0, 8.0)
+        expected = _greedy_split(starts, ends, 99.0, max_words, max_duration)
+        assert ws._split_words(starts, ends, 99.0, max_words, max_duration) == expected
+
+def test_split_words_breaks_at_widest_pause():
+    # 20 words; a pause after the 10th, where a greedy split would cut 15 + 5
+    starts = np.array([i * 0.3 + (1.0 if i >= 10 else 0.0) for i in range(20)])
+    ends = starts + 0.25
+    chunks = ws._split_words(starts, ends, 10.0, 15, 30.0)
+    assert [(first, stop) for first, stop, _ in chunks] == [(0, 10), (10, 20)]
+    assert chunks[0][2] == ends[9]
+    assert chunks[1][2] == 10.0
+
+def test_split_words_never_exceeds_limits():
+    import random
+    rng = random.Random(11)
+    for _ in range(100):
+        starts, t = [], 0.0
+        for _ in range(rng.randint(1, 80)):
+            t += rng.choice([0.0, 0.05, 0.8])
+            starts.append(t)
+            t += rng.uniform(0.1, 0.6)
+        starts = np.array(starts)
+        ends = starts + np.array([rng.uniform(0.1, 0.6) for _ in starts])
+        chunks = ws._split_words(starts, ends, 999.0, 12, 6.0)
+        assert [first for first, _, _ in chunks] == [0] + [stop for _, stop, _ in chunks[:-1]]
+        assert chunks[-1][1] == len(starts)
+        for first, stop, _ in chunks:
+            assert stop - first <= 12
+            assert stop - first == 1 or ends[stop - 2] - starts[first] < 6.0
+
+class _FakeLinear:
+    pass
+
+class _WhisperLinear(_FakeLinear):
+    pass
+
+def _quant_torch():
+    fake_torch = MagicMock()
+    fake_torch.nn.Linear = _FakeLinear
+    return fake_torch
+
+@pytest.mark.parametrize("quantized,device,expect_quant", [
+    (True, 'cpu', True),
+    (True, 'cuda', False),
+    (False, 'cpu', False),
+])
+def test_openai_whisper_int8_quantization(quantized, device, expect_quant):
+    fake_torch = _quant_torch()
+    layer = _WhisperLinear()
+    loaded = MagicMock()
+    loaded.modules.return_value = [loaded, layer]
+    fake_whisper = MagicMock()
+    fake_whisper.load_model.return_value = loaded
+
+    with patch.object(ws, '_whisper_model', None), \
+         patch.object(ws, 'WHISPER_QUANTIZED', quantized), \
+         patch.object(ws, 'get_whisper_backend', return_value='openai-whisper'), \
+         patch.object(ws, 'get_whisper_device', return_value=device), \
+         patch.object(ws, '_ensure_torch', return_value=fake_torch), \
+         patch.dict(sys.modules, {'whisper': fake_whisper}):
+        model = ws.get_whisper_model()
+
+    if expect_quant:
+        fake_torch.quantization.quantize_dynamic.assert_called_once_with(
+            loaded, {_FakeLinear}, dtype=fake_torch.qint8)
+        assert model is fake_torch.quantization.quantize_dynamic.return_value
+        # The whisper Linear subclass is exposed as plain nn.Linear so it gets matched
+        assert type(layer) is _FakeLinear
+    else:
+        fake_torch.quantization.quantize_dynamic.assert_not_called()
+        assert model is loaded
@@ -1,9 +1,14 @@
 import pytest
+import os
 import sys
+import numpy as np
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
+from backend.services import whisper_service
 from backend.services.whisper_service import (
     run_whisper_process,
     get_whisper_device,
+    get_mlx_model_path,
     refine_segment_boundaries,
     trim_silence_padding,
     smooth_segment_transitions,
@@ -100,6 +105,148 @@ def test_run_whisper_process_segment_level_diarization(mock_get_whisper_model, m
         assert result['segments'][0]['speaker'] == 'SPEAKER_A'
         assert result['segments'][0]['text'] == 'Hello World'
 
+def test_run_whisper_process_diarizes_during_transcription(mock_get_whisper_model, mock_vad):
+    """Diarization runs on a worker thread while Whisper transcribes, not after it."""
+    import threading
+    both_running = threading.Barrier(2, timeout=5)
+
+    def transcribe(*args, **kwargs):
+        both_running.wait()
+        return {
+            'segments': [{'start': 0.0, 'end': 2.0, 'text': 'Hello World', 'words': []}],
+            'text': 'Hello World',
+            'language': 'en'
+        }
+
+    turn = MagicMock(start=0.0, end=2.0)
+    annotation = MagicMock()
+    annotation.itertracks.return_value = [(turn, None, "SPEAKER_A")]
+
+    def diarize(*args, **kwargs):
+        both_running.wait()
+        return MagicMock(speaker_diarization=annotation)
+
+    mock_get_whisper_model.return_value.transcribe.side_effect = transcribe
+    mock_pipeline = MagicMock(side_effect=diarize)
+
+    with patch('backend.services.whisper_service.get_whisper_backend', return_value='openai-whisper'), \
+         patch('backend.services.whisper_service.get_diarization_pipeline', return_value=mock_pipeline), \
+         patch('backend.services.whisper_service.ENABLE_WHISPER', True), \
+         patch('backend.services.whisper_service.ENABLE_DIARIZATION', True), \
+         patch('os.path.exists', return_value=True), \
+         patch('subprocess.run'):
+
+        result = run_whisper_process("fake_audio.mp3")
+
+    # Both sides met at the barrier, so neither waited for the other to finish
+    assert result['segments'][0]['speaker'] == 'SPEAKER_A'
+
+def _join_diarization_workers():
+    import threading
+    for thread in threading.enumerate():
+        if thread.name.startswith('diarization'):
+            thread.join(5)
+
+def test_run_whisper_process_no_segments_skips_vad_and_diarization(mock_get_whisper_model):
+    """Silent audio returns right after transcription and the pyannote pipeline never runs."""
+    import threading
+    decoded = threading.Event()
+    mock_pipeline = MagicMock()
+
+    def decode(path):
+        # Hold the worker before the pipeline until run_whisper_process has returned
+        decoded.wait(5)
+        return np.zeros(16, np.float32)
+
+    mock_get_whisper_model.return_value.transcribe.return_value = {'segments': [], 'text': '', 'language': 'en'}
+
+    try:
+        with patch('backend.services.whisper_service.get_whisper_backend', return_value='openai-whisper'), \
+             patch('backend.services.whisper_service.get_diarization_pipeline', return_value=mock_pipeline), \
+             patch('backend.services.whisper_service.ENABLE_WHISPER', True), \
+             patch('backend.services.whisper_service.ENABLE_DIARIZATION', True), \
+             patch('backend.services.whisper_service.ENABLE_VAD', True), \
+             patch('backend.services.whisper_service.get_speech_timestamps') as mock_vad_ts, \
+             patch('backend.services.whisper_service.get_pcm_16k_mono', side_effect=decode), \
+             patch('backend.services.whisper_service._ensure_torch'), \
+             patch('os.path.exists', return_value=True), \
+             patch('subprocess.run'):
+
+            result = run_whisper_process("silent.mp3")
+            decoded.set()
+            _join_diarization_workers()
+
+            assert result == {'segments': [], 'text': '', 'language': 'en'}
+            mock_vad_ts.assert_not_called()
+            mock_pipeline.assert_not_called()
+    finally:
+        decoded.set()
+
+def test_run_whisper_process_transcription_error_stops_diarization(mock_get_whisper_model):
+    """A failed transcription cancels diarization instead of leaving it running."""
+    import threading
+    decoded = threading.Event()
+    mock_pipeline = MagicMock()
+
+    def decode(path):
+        decoded.wait(5)
+        return np.zeros(16, np.float32)
+
+    mock_get_whisper_model.return_value.transcribe.side_effect = RuntimeError("out of memory")
+
+    try:
+        with patch('backend.services.whisper_service.get_whisper_backend', return_value='openai-whisper'), \
+             patch('backend.services.whisper_service.get_diarization_pipeline', return_value=mock_pipeline), \
+             patch('backend.services.whisper_service.ENABLE_WHISPER', True), \
+             patch('backend.services.whisper_service.ENABLE_DIARIZATION', True), \
+             patch('backend.services.whisper_service.get_pcm_16k_mono', side_effect=decode), \
+             patch('backend.services.whisper_service._ensure_torch'), \
+             patch('os.path.exists', return_value=True), \
+             patch('subprocess.run'):
+
+            with pytest.raises(RuntimeError):
+                run_whisper_process("broken.mp3")
+            decoded.set()
+            _join_diarization_workers()
+
+            mock_pipeline.assert_not_called()
+    finally:
+        decoded.set()
+
+def test_monotonic_progress_never_moves_backwards():
+    """Interleaved Whisper and diarization updates keep the highest percentage reached."""
+    from backend.services.whisper_service import _monotonic_progress
+
+    callback = MagicMock()
+    report = _monotonic_progress(callback)
+    report('whisper', 'Transcribing...', 35)
+    report('diarization', 'Diarization: segmentation (50%)', 56)
+    report('whisper', 'Transcribing...', 36)
+
+    assert [c.args[2] for c in callback.call_args_list] == [35, 56, 56]
+    assert callback.call_args_list[-1].args[:2] == ('whisper', 'Transcribing...')
+
+def test_run_diarization_stops_at_next_hook_once_cancelled():
+    """A cancelled run aborts inside the pipeline without reporting more progress."""
+    import threading
+    from backend.services.whisper_service import _run_diarization, _DiarizationCancelled
+
+    cancel = threading.Event()
+    progress = MagicMock()
+
+    def pipeline(audio, hook=None, **kwargs):
+        hook('segmentation', None, total=10, completed=1)
+        cancel.set()
+        hook('segmentation', None, total=10, completed=2)
+        return MagicMock()
+
+    with patch('backend.services.whisper_service.get_pcm_16k_mono', return_value=np.zeros(16, np.float32)), \
+         patch('backend.services.whisper_service._ensure_torch'):
+        with pytest.raises(_DiarizationCancelled):
+            _run_diarization(pipeline, "audio.m4a", progress, cancel)
+
+    assert progress.call_count == 1
+
 def test_run_whisper_process_long_segment_split(mock_get_whisper_model, mock_vad):
     """Test that segments exceeding MAX_SUBTITLE_WORDS are split."""
     mock_model = mock_get_whisper_model.return_value
@@ -151,63 +298,177 @@ def test_run_whisper_process_long_segment_split(mock_get_whisper_model, mock_vad
         # All segments should have the same speaker
         for seg in result['segments']:
             assert seg['speaker'] == 'SPEAKER_A'
+        assert ' '.join(seg['text'] for seg in result['segments']) == ' '.join(unique_words)
+        # The full transcript is not replaced by the last sub-segment's text
+        assert result['text'] == ' '.join(unique_words)
+
+class _ArrayTensor(np.ndarray):
+    """Just enough of the torch.Tensor surface for get_speech_timestamps, backed by numpy."""
+
+    def unsqueeze(self, dim):
+        return np.expand_dims(self, dim)
+
+    def squeeze(self):
+        return np.ndarray.squeeze(self)
+
 
 def test_get_speech_timestamps_pipe(mock_vad):
     """Test that get_speech_timestamps uses ffmpeg pipe when torchaudio load fails."""
     from backend.services.whisper_service import get_speech_timestamps
 
-    # Mock optional modules so test works even when torchaudio/numpy are not installed.
+    def load(path):
+        raise RuntimeError("Format not supported")
+
+    fake_torchaudio = SimpleNamespace(load=load)
+    fake_torch = SimpleNamespace(from_numpy=lambda array: array.view(_ArrayTensor))
+    chunks = []
+
+    def get_speech_ts(chunk, model, sampling_rate, threshold):
+        chunks.append(chunk)
+        return [{'start': 1600, 'end': 8000}]
+
+    # 1 second of 16-bit mono 16kHz silence
+    ffmpeg_result = SimpleNamespace(stdout=np.zeros(16000, np.int16).tobytes(), returncode=0)
+
+    with patch.dict(sys.modules, {'torchaudio': fake_torchaudio, 'av': None}), \
+         patch('backend.services.whisper_service.ENABLE_VAD', True), \
+         patch('backend.services.whisper_service.get_vad_model',
+               return_value=(lambda chunk: None, (get_speech_ts, None, None, None, None), 'cpu')), \
+         patch('backend.services.whisper_service._ensure_torch', return_value=fake_torch), \
+         patch('backend.services.whisper_service.subprocess.run', return_value=ffmpeg_result) as mock_run:
+
+        timestamps = get_speech_timestamps("test.m4a")
+
+    # Verify ffmpeg pipe called
+    mock_run.assert_called_once()
+    cmd = mock_run.call_args[0][0]
+    assert cmd[0] == 'ffmpeg'
+    assert '-i' in cmd
+    assert 'test.m4a' in cmd
+    assert '-' in cmd # Pipe output
+    assert 's16le' in cmd # Format
+
+    # The decoded PCM reaches the VAD as a single flat 16kHz chunk
+    assert len(chunks) == 1
+    assert chunks[0].shape == (16000,)
+    assert chunks[0].dtype == np.float32
+    assert timestamps == [{'start': 0.1, 'end': 0.5}]
+
+
+def test_get_speech_timestamps_pyav_decode(mock_vad):
+    """Test that PyAV decodes in-process before falling back to the ffmpeg pipe."""
+    from backend.services.whisper_service import get_speech_timestamps
+
     mock_torchaudio = MagicMock()
     mock_torchaudio.load.side_effect = Exception("Format not supported")
-    mock_numpy = MagicMock()
-    mock_numpy.int16 = "int16"
-    mock_numpy.float32 = "float32"
 
-    mock_np_array = MagicMock()
-    mock_numpy.frombuffer.return_value.flatten.return_value.astype.return_value = mock_np_array
-    mock_np_array.__truediv__.return_value = mock_np_array
+    def resample(frame):
+        if frame is None:
+            return []
+        out = MagicMock()
+        out.to_ndarray.return_value = np.full((1, 4), 16384, dtype=np.int16)
+        return [out]
+
+    mock_av = MagicMock()
+    container = mock_av.open.return_value.__enter__.return_value
+    container.decode.return_value = [object(), object()]
+    mock_av.AudioResampler.return_value.resample.side_effect = resample
 
     mock_torch = MagicMock()
     mock_tensor = MagicMock()
     mock_tensor.unsqueeze.return_value = mock_tensor
     mock_tensor.squeeze.return_value = mock_tensor
-    mock_tensor.__len__.return_value = 16000
+    mock_tensor.__len__.return_value = 8
     mock_tensor.__getitem__.return_value = mock_tensor
-    mock_tensor.shape = [1, 16000]
+    mock_tensor.shape = [1, 8]
     mock_torch.from_numpy.return_value = mock_tensor
 
-    with patch.dict(sys.modules, {'torchaudio': mock_torchaudio, 'numpy': mock_numpy}), \
+    with patch.dict(sys.modules, {'torchaudio': mock_torchaudio, 'av': mock_av}), \
          patch('backend.services.whisper_service.ENABLE_VAD', True), \
          patch('backend.services.whisper_service.get_vad_model') as mock_get_model, \
          patch('backend.services.whisper_service._ensure_torch', return_value=mock_torch), \
          patch('backend.services.whisper_service.subprocess.run') as mock_run:
+        mock_get_model.return_value = (MagicMock(), (MagicMock(),), 'cpu')
+
+        get_speech_timestamps("test.m4a")
 
-        # Mock VAD model return
-        mock_model = MagicMock()
-        mock_utils = (MagicMock(),) # Tuple as in real implementation
-        mock_get_model.return_value = (mock_model, mock_utils, 'cpu')
+        mock_run.assert_not_called()
+        mock_av.AudioResampler.assert_called_once_with(format='s16', layout='mono', rate=16000)
+        decoded = mock_torch.from_numpy.call_args[0][0]
+        assert decoded.dtype == np.float32
+        assert decoded.tolist() == [0.5] * 8
 
-        # Mock subprocess.run success
-        mock_process = MagicMock()
-        # Return 32k bytes (enough for 1 second of 16-bit mono 16kHz audio)
-        mock_process.stdout = b'\x00' * 32000
-        mock_process.returncode = 0
-        mock_run.return_value = mock_process
 
-        # Run function
-        get_speech_timestamps("test.m4a")
+def test_get_pcm_16k_mono_decodes_once(tmp_path):
+    """Repeated requests for the same unchanged file share one ffmpeg decode."""
+    from backend.services.whisper_service import get_pcm_16k_mono
+
+    audio_file = tmp_path / "audio.m4a"
+    audio_file.write_bytes(b"fake")
+    pcm = np.array([16384, -16384], dtype=np.int16).tobytes()
 
-        # Verify torchaudio.load called first
-        mock_torchaudio.load.assert_called_with("test.m4a")
+    with patch.dict(sys.modules, {'av': None}), \
+         patch('backend.services.whisper_service.subprocess.run', return_value=MagicMock(stdout=pcm)) as mock_run:
+        first = get_pcm_16k_mono(str(audio_file))
+        second = get_pcm_16k_mono(str(audio_file))
 
-        # Verify ffmpeg pipe called
-        mock_run.assert_called_once()
-        cmd = mock_run.call_args[0][0]
-        assert cmd[0] == 'ffmpeg'
-        assert '-i' in cmd
-        assert 'test.m4a' in cmd
-        assert '-' in cmd # Pipe output
-        assert 's16le' in cmd # Format
+        os.utime(audio_file, (0, 0))
+        get_pcm_16k_mono(str(audio_file))
+
+    assert first.tolist() == [0.5, -0.5]
+    assert second is first
+    assert mock_run.call_count == 2  # re-decoded only after the file changed
+
+
+def test_run_whisper_process_releases_shared_decode(tmp_path, mock_get_whisper_model):
+    """The cached PCM decode is dropped when the run ends instead of staying alive."""
+    audio_file = tmp_path / "audio.m4a"
+    audio_file.write_bytes(b"fake")
+    pcm = np.zeros(32, dtype=np.int16).tobytes()
+    cached_during_run = []
+
+    def vad(path, progress_callback=None):
+        whisper_service.get_pcm_16k_mono(path)
+        cached_during_run.append(whisper_service._decode_pcm_16k_mono.cache_info().currsize)
+        return []
+
+    mock_get_whisper_model.return_value.transcribe.return_value = {
+        'segments': [{'start': 0.0, 'end': 1.0, 'text': 'Hello', 'words': []}],
+        'text': 'Hello',
+        'language': 'en'
+    }
+
+    with patch.dict(sys.modules, {'av': None}), \
+         patch.dict(os.environ, {'ENABLE_AUDIO_NORMALIZATION': 'false'}), \
+         patch('backend.services.whisper_service.subprocess.run', return_value=MagicMock(stdout=pcm)), \
+         patch('backend.services.whisper_service.get_whisper_backend', return_value='openai-whisper'), \
+         patch('backend.services.whisper_service.get_diarization_pipeline', return_value=None), \
+         patch('backend.services.whisper_service.ENABLE_WHISPER', True), \
+         patch('backend.services.whisper_service.ENABLE_VAD', True), \
+         patch('backend.services.whisper_service.get_speech_timestamps', side_effect=vad):
+        run_whisper_process(str(audio_file))
+
+    assert cached_during_run == [1]
+    assert whisper_service._decode_pcm_16k_mono.cache_info().currsize == 0
+
+
+def test_run_diarization_reuses_shared_decode():
+    """Diarization takes the shared in-memory decode instead of converting to WAV."""
+    from backend.services.whisper_service import _run_diarization
+
+    pipeline = MagicMock()
+    pipeline.return_value.itertracks.return_value = iter([])
+    mock_torch = MagicMock()
+
+    with patch('backend.services.whisper_service.get_pcm_16k_mono', return_value=np.zeros(16, np.float32)), \
+         patch('backend.services.whisper_service._ensure_torch', return_value=mock_torch), \
+         patch('backend.services.whisper_service.subprocess.run') as mock_run:
+        assert _run_diarization(pipeline, "audio.m4a") == []
+
+    mock_run.assert_not_called()
+    audio = pipeline.call_args[0][0]
+    assert audio["sample_rate"] == 16000
+    assert audio["waveform"] is mock_torch.from_numpy.return_value.unsqueeze.return_value
 
 
 def test_run_whisper_process_mlx_backend(mock_vad):
@@ -235,14 +496,31 @@ def test_run_whisper_process_mlx_backend(mock_vad):
 
         result = run_whisper_process("fake_audio.mp3")
 
-        # Verify MLX direct was called
+        # Verify MLX direct was called with the pinned mlx-community repo
         mock_mlx_direct.assert_called_once()
+        assert mock_mlx_direct.call_args[0][1] == 'mlx-community/whisper-base-mlx'
 
         # Verify result structure
         assert 'segments' in result
         assert result['text'] == 'Hello MLX'
 
 
+@pytest.mark.parametrize("size,repo", [
+    ('tiny', 'mlx-community/whisper-tiny-mlx'),
+    ('base', 'mlx-community/whisper-base-mlx'),
+    ('small', 'mlx-community/whisper-small-mlx'),
+    ('medium', 'mlx-community/whisper-medium-mlx'),
+    ('large-v3', 'mlx-community/whisper-large-v3-mlx'),
+    ('unknown', 'mlx-community/whisper-base-mlx'),
+    ('someone/custom-whisper', 'someone/custom-whisper'),
+])
+def test_get_mlx_model_path_pinned_repos(size, repo):
+    """Model sizes resolve to pinned mlx-community repos; full HF paths pass through."""
+    with patch('backend.services.whisper_service.WHISPER_HF_REPO', ''), \
+         patch('backend.services.whisper_service.WHISPER_MODEL_SIZE', size):
+        assert get_mlx_model_path() == repo
+
+
 def test_get_whisper_device_all_backends():
     """Test device detection for all supported backends."""
     with patch('backend.services.whisper_service.get_whisper_backend', return_value='mlx-whisper'):
@@ -255,14 +533,30 @@ def test_get_whisper_device_all_backends():
             mock_torch.cuda.is_available.return_value = True
             assert get_whisper_device() == "cuda"
 
+            # Devices are memoized per backend; forget them before changing the hardware
+            whisper_service._whisper_devices.clear()
             mock_torch.cuda.is_available.return_value = False
             mock_torch.backends.mps.is_available.return_value = True
             assert get_whisper_device() == "mps"
 
+            whisper_service._whisper_devices.clear()
             mock_torch.backends.mps.is_available.return_value = False
             assert get_whisper_device() == "cpu"
 
 
+def test_get_whisper_device_probes_once_per_backend():
+    """Repeated device queries reuse the first probe instead of re-checking torch."""
+    mock_torch = MagicMock()
+    mock_torch.cuda.is_available.return_value = True
+    with patch('backend.services.whisper_service.get_whisper_backend', return_value='openai-whisper'), \
+         patch('backend.services.whisper_service._ensure_torch', return_value=mock_torch) as mock_ensure_torch:
+        assert [get_whisper_device() for _ in range(3)] == ["cuda"] * 3
+        mock_ensure_torch.assert_called_once()
+
+    with patch('backend.services.whisper_service.get_whisper_backend', return_value='mlx-whisper'):
+        assert get_whisper_device() == "metal"
+
+
 # =============================================================================
 # Timestamp Refinement Tests
 # =============================================================================
@@ -296,6 +590,35 @@ class TestRefineSegmentBoundaries:
         assert result[0]['start'] == 0.5  # First word start
         assert result[0]['end'] == 1.8    # Last word end
 
+    @pytest.mark.parametrize("first_word", [
+        {'word': 'So', 'start': 1.0, 'end': 1.0},   # start not before end
+        {'word': 'So', 'start': 1.4, 'end': 0.9},   # start after end
+        {'word': 'So', 'start': 0.0, 'end': 0.2},   # stranded 2s+ before the next word
+    ])
+    def test_unreliable_first_word_start_is_skipped(self, first_word):
+        """Pathological first-word timestamps fall through to the next reliable word."""
+        segments = [{
+            'start': 0.0, 'end': 4.0, 'text': 'So hello world',
+            'words': [
+                first_word,
+                {'word': 'hello', 'start': 2.5, 'end': 2.9},
+                {'word': 'world', 'start': 3.0, 'end': 3.4},
+            ]
+        }]
+        result = refine_segment_boundaries(segments)
+        assert result[0]['start'] == 2.5
+        assert result[0]['end'] == 3.4
+
+    def test_no_reliable_word_keeps_first_word_start(self):
+        """If no word timestamp looks reliable, the first word's start is still used."""
+        segments = [{
+            'start': 0.0, 'end': 2.0, 'text': 'Hi',
+            'words': [{'word': 'Hi', 'start': 0.6, 'end': 0.6}]
+        }]
+        result = refine_segment_boundaries(segments)
+        assert result[0]['start'] == 0.6
+        assert result[0]['end'] == 0.6
+
     def test_multiple_segments(self):
         """Multiple segments should all be refined."""
         segments = [
@@ -352,6 +675,22 @@ class TestTrimSilencePadding:
         assert result[0]['end'] - result[0]['start'] >= 0.2
 
 
+    def test_mixed_segments_in_one_call(self):
+        """Short, long and near-minimum segments are each handled on their own."""
+        segments = [
+            {'start': 0.0, 'end': 0.4},   # short: untouched
+            {'start': 1.0, 'end': 3.0},   # long: both edges trimmed
+            {'start': 4.0, 'end': 4.6},   # long, but trimming the end would leave <200ms: end kept
+        ]
+        result = trim_silence_padding(segments, trim_start_ms=50, trim_end_ms=400)
+        assert result[0] == {'start': 0.0, 'end': 0.4}
+        assert result[1]['start'] == pytest.approx(1.05)
+        assert result[1]['end'] == pytest.approx(2.6)
+        assert result[2]['start'] == pytest.approx(4.05)
+        assert result[2]['end'] == 4.6
+        assert segments[1] == {'start': 1.0, 'end': 3.0}
+
+
 class TestSmoothSegmentTransitions:
     """Tests for smooth_segment_transitions function."""
 
@@ -399,6 +738,21 @@ class TestSmoothSegmentTransitions:
         assert result[0]['end'] == 2.8
 
 
+    def test_consecutive_gaps_bridged_independently(self):
+        """Each small gap is closed, overlaps and large gaps are left alone, inputs untouched."""
+        segments = [
+            {'start': 0.0, 'end': 1.0},
+            {'start': 1.2, 'end': 2.0},   # 0.2s gap -> bridged
+            {'start': 2.1, 'end': 3.0},   # 0.1s gap -> bridged
+            {'start': 2.9, 'end': 4.0},   # overlap -> unchanged
+            {'start': 5.0, 'end': 6.0},   # 1.0s gap -> unchanged
+        ]
+        result = smooth_segment_transitions(segments)
+        assert [s['end'] for s in result] == [1.2, 2.1, 3.0, 4.0, 6.0]
+        assert [s['start'] for s in result] == [s['start'] for s in segments]
+        assert segments[0]['end'] == 1.0
+
+
 class TestRefineTimestamps:
     """Tests for the combined refine_timestamps function."""
 
@@ -446,3 +800,25 @@ class TestRefineTimestamps:
         assert result[0]['text'] == 'Hello'
         assert result[0]['speaker'] == 'SPEAKER_A'
         assert result[0]['confidence'] == 0.95
+
+    def test_matches_step_by_step_pipeline(self):
+        """The fused single pass gives the same result as chaining the three steps."""
+        import copy
+        import random
+        rng = random.Random(3)
+        segments = []
+        t = 0.0
+        for _ in range(50):
+            start = t + rng.uniform(0, 0.6)
+            end = start + rng.uniform(0.1, 4.0)
+            seg = {'start': start, 'end': end, 'text': 'x'}
+            if rng.random() < 0.5:
+                seg['words'] = [{'word': 'x', 'start': start + 0.1, 'end': end - 0.05}]
+            segments.append(seg)
+            t = end
+        original = copy.deepcopy(segments)
+
+        expected = smooth_segment_transitions(trim_silence_padding(refine_segment_boundaries(segments)))
+
+        assert refine_timestamps(segments) == expected
+        assert segments == original  # inputs are not mutated
@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 from backend.services.youtube_service import fetch_subtitles
 
 @pytest.fixture
@@ -9,7 +10,7 @@ def mock_yt_dlp():
 
 @pytest.fixture
 def mock_requests():
-    with patch('backend.services.youtube_service.requests.get') as mock:
+    with patch('backend.services.youtube_service._session.get') as mock:
         yield mock
 
 def test_fetch_subtitles_complex_selection(mock_yt_dlp, mock_requests, mock_cache_dir):
@@ -26,14 +27,13 @@ def test_fetch_subtitles_complex_selection(mock_yt_dlp, mock_requests, mock_cach
     }
     
     # helper to mock requests get
+    payloads = {
+        'http://es.json3': {'events': [{'text': 'Hola'}]},
+        'http://fr-auto.json3': {'events': [{'text': 'Bonjour'}]},  # auto handling
+    }
+
     def mock_get(url, *args, **kwargs):
-        resp = MagicMock()
-        resp.status_code = 200
-        if 'es.json3' in url:
-            resp.json.return_value = {'events': [{'text': 'Hola'}]}
-        elif 'fr-auto.json3' in url: # auto handling
-             resp.json.return_value = {'events': [{'text': 'Bonjour'}]}
-        return resp
+        return SimpleNamespace(status_code=200, headers={}, json=lambda: payloads[url])
         
     mock_requests.side_effect = mock_get
 
@@ -59,9 +59,7 @@ def test_fetch_subtitles_download_fail(mock_yt_dlp, mock_requests, mock_cache_di
     }
     
     # Mock fail response
-    fail_resp = MagicMock()
-    fail_resp.status_code = 500
-    mock_requests.return_value = fail_resp
+    mock_requests.return_value = SimpleNamespace(status_code=500, headers={})
     
     with patch('backend.services.youtube_service.get_cache_path', return_value=f"{mock_cache_dir}/test_cache_fail.json"):
         res, status = fetch_subtitles('vid', 'en')
@@ -1,7 +1,12 @@
 import pytest
-from unittest.mock import MagicMock, patch, ANY
+from unittest.mock import patch, ANY
 import os
-from backend.services.youtube_service import fetch_subtitles, ensure_audio_downloaded
+from collections import deque
+from types import SimpleNamespace
+from backend.services import youtube_service
+from backend.services.youtube_service import (
+    fetch_subtitles, ensure_audio_downloaded, _rate_limit_wait, MAX_RETRY_AFTER_SECONDS
+)
 
 @pytest.fixture
 def mock_yt_dlp():
@@ -10,7 +15,7 @@ def mock_yt_dlp():
 
 @pytest.fixture
 def mock_requests():
-    with patch('backend.services.youtube_service.requests.get') as mock:
+    with patch('backend.services.youtube_service._session.get') as mock:
         yield mock
 
 # Test Logic 1: Find best track
@@ -98,12 +103,8 @@ def test_fetch_subtitles_retry_logic(mock_yt_dlp, mock_requests, mock_cache_dir)
         'subtitles': {'en': [{'ext': 'json3', 'url': 'http://json3'}]}
     }
     
-    resp_429 = MagicMock()
-    resp_429.status_code = 429
-    
-    resp_200 = MagicMock()
-    resp_200.status_code = 200
-    resp_200.json.return_value = {}
+    resp_429 = SimpleNamespace(status_code=429, headers={})
+    resp_200 = SimpleNamespace(status_code=200, headers={}, json=lambda: {})
     
     mock_requests.side_effect = [resp_429, resp_200]
     
@@ -114,17 +115,78 @@ def test_fetch_subtitles_retry_logic(mock_yt_dlp, mock_requests, mock_cache_dir)
         assert status == 200
         mock_sleep.assert_called_once() # Called once for retry
 
+def test_fetch_subtitles_persistent_429_skips_final_sleep(mock_yt_dlp, mock_requests, mock_cache_dir):
+    mock_instance = mock_yt_dlp.return_value.__enter__.return_value
+    mock_instance.extract_info.return_value = {
+        'subtitles': {'en': [{'ext': 'json3', 'url': 'http://json3'}]}
+    }
+    mock_requests.return_value = SimpleNamespace(status_code=429, headers={})
+
+    with patch('backend.services.youtube_service.get_cache_path', return_value=f"{mock_cache_dir}/test_retry.json"), \
+         patch('time.sleep') as mock_sleep:
+        res, status = fetch_subtitles('vid', 'en')
+
+    assert status == 429
+    assert mock_requests.call_count == 3
+    assert mock_sleep.call_count == 2  # No wait after the last attempt
+
+
+@pytest.mark.parametrize("retry_after,expected", [
+    ('3', 3.0),
+    (' 7 ', 7.0),
+    ('3600', MAX_RETRY_AFTER_SECONDS),  # Capped
+])
+def test_rate_limit_wait_honors_retry_after(retry_after, expected):
+    res = SimpleNamespace(headers={'Retry-After': retry_after})
+    assert _rate_limit_wait(res, 0) == expected
+
+
+@pytest.mark.parametrize("retry_after", ['\u00b2', 'Wed, 21 Oct 2015 07:28:00 GMT', '-1', '1.5', ''])
+def test_rate_limit_wait_falls_back_on_unusable_header(retry_after):
+    res = SimpleNamespace(headers={'Retry-After': retry_after})
+    with patch('backend.services.youtube_service.random.uniform', return_value=0.5):
+        assert _rate_limit_wait(res, 1) == 6.0
+
+
+def test_rate_limit_wait_backs_off_exponentially_and_under_pressure():
+    res = SimpleNamespace(headers={})
+    with patch('backend.services.youtube_service.random.uniform', return_value=0.0):
+        assert [_rate_limit_wait(res, attempt) for attempt in range(3)] == [2.0, 4.0, 8.0]
+        # Each other recent 429 in the process adds to the wait, up to the cap
+        assert _rate_limit_wait(res, 0, recent=5) == 4.0
+        assert _rate_limit_wait(res, 3, recent=200) == youtube_service.RATE_LIMIT_MAX_SECONDS
+
+
+def test_record_rate_limit_counts_only_the_recent_window():
+    with patch.object(youtube_service, '_recent_rate_limits', deque(maxlen=256)), \
+         patch('backend.services.youtube_service.time.monotonic', side_effect=[0.0, 10.0, 100.0]):
+        assert youtube_service._record_rate_limit() == 1
+        assert youtube_service._record_rate_limit() == 2
+        # Both earlier 429s are older than the window by now
+        assert youtube_service._record_rate_limit() == 1
+
+
+def _dir_entry(name, size=2000, is_file=True):
+    return SimpleNamespace(name=name, path=f'/cache/audio/{name}', is_file=lambda: is_file,
+                           stat=lambda: SimpleNamespace(st_size=size))
+
 def test_ensure_audio_downloaded_variant(mock_yt_dlp):
-    # Mock fallback scan: file exists but not exact name match (maybe different extension in listdir)
+    # Mock fallback scan: file exists but not exact name match (maybe different extension in the listing)
     # Actually logic:
     # Check exact match for each ext.
-    # IF fail, check os.listdir for startswith(safe_vid_id)
+    # IF fail, scan the cache dir for a file starting with safe_vid_id
 
+    entries = [
+        _dir_entry('other.mp3'),
+        _dir_entry('vid123.d', is_file=False),
+        _dir_entry('vid123.webm', size=10),  # Too small to be valid audio
+        _dir_entry('vid123.mp3'),
+    ]
     with patch('backend.services.video_loader.is_allowed_url', return_value=True), \
          patch('os.path.exists', return_value=False), \
          patch('os.makedirs'), \
-         patch('os.listdir', return_value=['vid123.mp3']), \
-         patch('os.path.getsize', return_value=2000): # Size > 1000
+         patch('os.scandir') as mock_scandir:
+        mock_scandir.return_value.__enter__.return_value = iter(entries)
 
         path = ensure_audio_downloaded('vid123', 'https://youtube.com/watch?v=vid123')
         assert path.endswith('vid123.mp3')
@@ -136,7 +198,7 @@ def test_ensure_audio_downloaded_fail(mock_yt_dlp):
     
     with patch('os.path.exists', return_value=False), \
          patch('os.makedirs'), \
-         patch('os.listdir', return_value=[]):
+         patch('os.scandir'):
         
         path = ensure_audio_downloaded('vid', 'url')
         assert path is None
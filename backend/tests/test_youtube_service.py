@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from backend.services.youtube_service import fetch_subtitles, ensure_audio_downloaded
+from backend.services.youtube_service import fetch_subtitles, ensure_audio_downloaded, sanitize_video_id
 
 @pytest.fixture
 def mock_yt_dlp():
@@ -9,7 +9,7 @@ def mock_yt_dlp():
 
 @pytest.fixture
 def mock_requests():
-    with patch('backend.services.youtube_service.requests.get') as mock:
+    with patch('backend.services.youtube_service._session.get') as mock:
         yield mock
 
 def test_fetch_subtitles_success(mock_yt_dlp, mock_requests, mock_cache_dir):
@@ -58,13 +58,13 @@ def test_fetch_subtitles_not_found(mock_yt_dlp, mock_requests):
 def test_ensure_audio_downloaded_cached(mock_yt_dlp):
     # Mock file existence
     with patch('os.path.exists') as mock_exists, \
-         patch('os.path.getsize') as mock_size, \
-         patch('os.listdir') as mock_listdir:
+         patch('os.stat') as mock_stat, \
+         patch('os.makedirs'), \
+         patch('os.scandir'):
         
         # Scenario: File already exists
         mock_exists.return_value = True
-        mock_size.return_value = 2000
-        mock_listdir.return_value = []
+        mock_stat.return_value.st_size = 2000
         
         path = ensure_audio_downloaded("video123", "http://youtube.com/watch?v=video123")
         
@@ -82,7 +82,7 @@ def test_ensure_audio_download_fresh(mock_yt_dlp):
     with patch('os.path.exists', side_effect=exists_side_effect) as mock_exists, \
          patch('os.path.getsize') as mock_size, \
          patch('os.makedirs') as mock_makedirs, \
-         patch('os.listdir', return_value=[]):
+         patch('os.scandir'):
         
         mock_instance = mock_yt_dlp.return_value.__enter__.return_value
         mock_instance.extract_info.return_value = {
@@ -99,3 +99,14 @@ def test_ensure_audio_download_fresh(mock_yt_dlp):
         # It should call extract_info to download
         mock_instance.extract_info.assert_called_once()
         assert path == '/tmp/downloaded.m4a'
+
+
+@pytest.mark.parametrize("raw", ["abc-123_XYZ", "../etc/passwd", "a b\tc\n", "vidéo日本", "x.y/z?w=1", "ab½²"])
+def test_sanitize_video_id_matches_isalnum_filter(raw):
+    expected = "".join(c for c in raw if c.isalnum() or c in ('-', '_'))
+    assert sanitize_video_id(raw) == expected
+
+@pytest.mark.parametrize("raw", ["CON", "lpt1", "nul.", "", "../"])
+def test_sanitize_video_id_rejects_reserved_or_empty(raw):
+    with pytest.raises(ValueError):
+        sanitize_video_id(raw)
@@ -23,9 +23,10 @@ def create_dummy_wav(filename, duration=2):
         wav_file.setnchannels(1)
         wav_file.setsampwidth(2)
         wav_file.setframerate(16000)
-        # Generate silence
-        data = b'\x00\x00' * 16000 * duration
-        wav_file.writeframes(data)
+        # Generate silence one second at a time so memory stays constant for long durations
+        silence = b'\x00\x00' * 16000
+        for _ in range(duration):
+            wav_file.writeframes(silence)
 
 def test_whisper():
     dummy_wav = os.path.abspath("dummy_direct.wav")
@@ -6,12 +6,89 @@ Uses ffmpeg for processing.
 """
 
 import os
+import json
+import math
 import subprocess
 import logging
+import threading
+from collections import deque
 from typing import Optional
 
 logger = logging.getLogger('subtide')
 
+# loudnorm options for the second pass, and the first-pass (get_audio_stats) field feeding each
+LOUDNORM_MEASURED = {
+    'measured_I': 'input_i',
+    'measured_TP': 'input_tp',
+    'measured_LRA': 'input_lra',
+    'measured_thresh': 'input_thresh',
+    'offset': 'target_offset',
+}
+
+
+# ffmpeg's progress output grows with input length; only the tail (where loudnorm
+# prints its summary) is kept
+FFMPEG_STDERR_TAIL_LINES = 200
+
+
+def _run_ffmpeg(cmd: list, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Run ffmpeg, streaming stderr and keeping only its last FFMPEG_STDERR_TAIL_LINES lines.
+
+    Raises subprocess.TimeoutExpired (after killing ffmpeg) if it runs longer than timeout.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace'
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        with proc.stderr:
+            tail = deque(proc.stderr, maxlen=FFMPEG_STDERR_TAIL_LINES)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return subprocess.CompletedProcess(cmd, returncode, stderr=''.join(tail))
+
+
+def _measured_options(stats: dict) -> Optional[str]:
+    """
+    Second-pass loudnorm options from a first-pass measurement, or None if it is unusable.
+
+    Silent or near-silent input measures as "-inf", which ffmpeg rejects as a
+    measured_* value, so anything that isn't a finite number falls back to single-pass.
+    """
+    options = []
+    for option, stat in LOUDNORM_MEASURED.items():
+        try:
+            value = float(stats[stat])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not math.isfinite(value):
+            return None
+        options.append(f":{option}={stats[stat]}")
+    return "".join(options)
+
+
+def _stats_cache_path(audio_path: str) -> str:
+    """Sidecar file holding the loudnorm measurement of audio_path."""
+    base, _ = os.path.splitext(audio_path)
+    return f"{base}_loudnorm.json"
+
 
 def normalize_audio(
     input_path: str,
@@ -56,8 +133,13 @@ def normalize_audio(
     try:
         if method == 'loudnorm':
             # EBU R128 loudness normalization - professional broadcast standard
-            # Two-pass for accurate normalization
-            filter_str = f"loudnorm=I={target_level}:TP=-1.5:LRA=11:print_format=summary"
+            # Two-pass for accurate normalization: feed the (cached) measurement pass into
+            # this one so loudnorm can apply a linear gain instead of dynamic compression
+            filter_str = f"loudnorm=I={target_level}:TP=-1.5:LRA=11"
+            measured = _measured_options(get_audio_stats(input_path))
+            if measured:
+                filter_str += measured + ":linear=true"
+            filter_str += ":print_format=summary"
         elif method == 'dynaudnorm':
             # Dynamic normalization - more aggressive, good for variable volumes
             filter_str = "dynaudnorm=f=150:g=15:p=0.95:m=10"
@@ -74,12 +156,7 @@ def normalize_audio(
             output_path
         ]
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
+        result = _run_ffmpeg(cmd, timeout=300)  # 5 minute timeout
         
         if result.returncode != 0:
             logger.warning(f"[AUDIO] ffmpeg normalization failed: {result.stderr[:500]}")
@@ -100,13 +177,43 @@ def normalize_audio(
         return input_path
 
 
+def _parse_loudnorm_json(stderr: str) -> dict:
+    """
+    Extract the JSON block loudnorm prints after its last '[Parsed_loudnorm' line.
+
+    The object is decoded in place from its opening brace, so nested objects and
+    braces inside strings are handled and the rest of the log is never scanned.
+    """
+    marker = stderr.rfind('[Parsed_loudnorm')
+    start = stderr.find('{', max(marker, 0))
+    if start < 0:
+        return {}
+    try:
+        stats, _ = json.JSONDecoder().raw_decode(stderr, start)
+    except ValueError:
+        return {}
+    return stats if isinstance(stats, dict) else {}
+
+
 def get_audio_stats(audio_path: str) -> dict:
     """
     Get audio statistics (loudness, peak, etc.) using ffmpeg.
     
+    The measurement is cached next to the audio (keyed on its mtime), so
+    should_normalize and normalize_audio share a single analysis pass.
+    
     Returns:
         Dict with audio stats or empty dict on failure
     """
+    cache_path = _stats_cache_path(audio_path)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('mtime_ns') == os.stat(audio_path).st_mtime_ns:
+            return cached['stats']
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
     try:
         cmd = [
             'ffmpeg',
@@ -116,29 +223,24 @@ def get_audio_stats(audio_path: str) -> dict:
             '-'
         ]
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
+        result = _run_ffmpeg(cmd, timeout=60)
         
         # Parse loudnorm JSON output from stderr
-        import json
-        import re
-        
-        # Find JSON block in output
-        match = re.search(r'\{[^}]+\}', result.stderr, re.DOTALL)
-        if match:
-            stats = json.loads(match.group())
-            return stats
-        
-        return {}
+        stats = _parse_loudnorm_json(result.stderr)
+        if not stats:
+            return {}
         
     except Exception as e:
         logger.debug(f"[AUDIO] Could not get audio stats: {e}")
         return {}
 
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'mtime_ns': os.stat(audio_path).st_mtime_ns, 'stats': stats}, f)
+    except OSError as e:
+        logger.debug(f"[AUDIO] Could not cache audio stats: {e}")
+    return stats
+
 
 def should_normalize(audio_path: str, threshold_lufs: float = -25.0) -> bool:
     """
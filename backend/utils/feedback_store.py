@@ -2,39 +2,209 @@
 Translation Feedback Storage
 
 Stores user feedback on translation quality for future analysis.
+
+Each gunicorn worker keeps its own in-memory copy. Every read and write first
+takes an exclusive lock on a lock file next to the feedback file and catches up
+with lines other workers appended, so compaction never drops their entries and
+stats agree across workers. Without fcntl (Windows) the lock is per process only,
+which is safe for the single-process desktop server.
 """
 
 import os
 import json
 import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Deque, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger('subtide')
 
-# Feedback file path
+# Feedback file path (JSON Lines: one entry per line, appended on each rating)
 FEEDBACK_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(__file__), '..', 'cache'))
-FEEDBACK_FILE = os.path.join(FEEDBACK_DIR, 'translation_feedback.json')
+FEEDBACK_FILE = os.path.join(FEEDBACK_DIR, 'translation_feedback.jsonl')
+LEGACY_FEEDBACK_FILE = os.path.join(FEEDBACK_DIR, 'translation_feedback.json')
 MAX_FEEDBACK_ENTRIES = 10000  # Limit storage size
+MAX_TEXT_BYTES = 500  # Per text field, in UTF-8, so entry size doesn't depend on the script
+COMPACT_EVERY = 1000  # Rewrite the file once this many trimmed entries have piled up in it
+
+# In-memory copy of the stored feedback, loaded on first use
+_feedback: Optional[Deque[Dict[str, Any]]] = None
+_file_entries = 0  # Lines in FEEDBACK_FILE, including entries already trimmed from memory
+_file_offset = 0  # Bytes of FEEDBACK_FILE already read into _feedback
+_file_id: Optional[Tuple[int, int]] = None  # (st_dev, st_ino) of the file read, to spot rewrites
+_feedback_lock = threading.Lock()
+
+# Running aggregates over _feedback, kept in step with it so stats never rescan the entries
+_positive = 0
+_negative = 0
+_negative_by_lang: Counter = Counter()
+
+
+def _tally(entry: Dict[str, Any], delta: int) -> None:
+    """Add (delta=1) or remove (delta=-1) an entry's contribution to the running aggregates."""
+    global _positive, _negative
+    rating = entry.get('rating', 0)
+    if rating > 0:
+        _positive += delta
+    elif rating < 0:
+        _negative += delta
+        lang = entry.get('target_lang', 'unknown')
+        _negative_by_lang[lang] += delta
+        if not _negative_by_lang[lang]:
+            del _negative_by_lang[lang]
+
+
+def _remember(entry: Dict[str, Any]) -> None:
+    """Add an entry to _feedback, dropping the oldest one once MAX_FEEDBACK_ENTRIES is reached."""
+    if len(_feedback) == _feedback.maxlen:
+        _tally(_feedback[0], -1)
+    _feedback.append(entry)
+    _tally(entry, 1)
+
+
+@contextmanager
+def _locked():
+    """Hold _feedback_lock and, where supported, an exclusive lock shared with other worker processes."""
+    with _feedback_lock:
+        lock_file = None
+        if fcntl is not None:
+            try:
+                os.makedirs(FEEDBACK_DIR, exist_ok=True)
+                lock_file = open(FEEDBACK_FILE + '.lock', 'a')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except OSError as e:
+                logger.warning(f"[FEEDBACK] Could not lock feedback file: {e}")
+        try:
+            yield
+        finally:
+            if lock_file is not None:
+                lock_file.close()  # Releases the flock
+
+
+def _cap_utf8(text: str, limit: int) -> str:
+    """Truncate text to at most limit UTF-8 bytes without splitting a character."""
+    if len(text) * 4 <= limit:
+        return text  # Short enough whatever the characters
+    return text.encode('utf-8')[:limit].decode('utf-8', 'ignore')
+
+
+def _read_entries_from(offset: int) -> Tuple[List[Dict[str, Any]], int, Tuple[int, int]]:
+    """Parse the complete lines of FEEDBACK_FILE after byte offset.
+
+    Returns:
+        Tuple of (entries, offset just past the last complete line, (st_dev, st_ino) of the file)
+    """
+    with open(FEEDBACK_FILE, 'rb') as f:
+        st = os.fstat(f.fileno())
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1  # A torn final line is left for the next read
+    entries = []
+    for line in data[:end].splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # A line torn by an interrupted append, then completed by the next one
+            logger.warning("[FEEDBACK] Skipping malformed feedback line")
+    return entries, offset + end, (st.st_dev, st.st_ino)
+
+
+def _read_feedback_file() -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[int, int]]]:
+    """Read all feedback entries from disk, migrating the legacy JSON array file if needed.
+
+    Returns:
+        Same as _read_entries_from, with no file identity if nothing is on disk yet
+    """
+    if not os.path.exists(FEEDBACK_FILE) and os.path.exists(LEGACY_FEEDBACK_FILE):
+        with open(LEGACY_FEEDBACK_FILE, 'r', encoding='utf-8') as f:
+            entries = json.load(f)[-MAX_FEEDBACK_ENTRIES:]
+        if not _save_feedback(entries):
+            return entries, 0, None
+        logger.info(f"[FEEDBACK] Migrated {len(entries)} entries to {FEEDBACK_FILE}")
 
+    if os.path.exists(FEEDBACK_FILE):
+        return _read_entries_from(0)
+    return [], 0, None
 
-def _load_feedback() -> List[Dict[str, Any]]:
-    """Load existing feedback from file."""
+
+def _load_feedback() -> Deque[Dict[str, Any]]:
+    """Return the in-memory feedback, caught up with the file. Caller holds _locked().
+
+    Lines other workers appended are read incrementally; if another worker rewrote the
+    file (compaction), it is reloaded in full.
+    """
+    global _feedback, _file_entries, _file_offset, _file_id, _positive, _negative
+    if _feedback is not None:
+        try:
+            st = os.stat(FEEDBACK_FILE)
+        except OSError:
+            return _feedback  # Nothing on disk to catch up with
+        if (st.st_dev, st.st_ino) == _file_id and st.st_size >= _file_offset:
+            if st.st_size > _file_offset:
+                try:
+                    entries, _file_offset, _ = _read_entries_from(_file_offset)
+                except OSError as e:
+                    logger.warning(f"[FEEDBACK] Failed to read new feedback: {e}")
+                    return _feedback
+                for entry in entries:
+                    _remember(entry)
+                _file_entries += len(entries)
+            return _feedback
+
+    entries, offset, file_id = [], 0, None
     try:
-        if os.path.exists(FEEDBACK_FILE):
-            with open(FEEDBACK_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        entries, offset, file_id = _read_feedback_file()
     except Exception as e:
         logger.warning(f"[FEEDBACK] Failed to load feedback: {e}")
-    return []
+    _feedback = deque(entries, maxlen=MAX_FEEDBACK_ENTRIES)
+    _file_entries = len(entries)
+    _file_offset, _file_id = offset, file_id
+    _positive = _negative = 0
+    _negative_by_lang.clear()
+    for entry in _feedback:
+        _tally(entry, 1)
+    return _feedback
+
+
+def _save_feedback(feedback_list) -> bool:
+    """Rewrite the feedback file with exactly feedback_list. Caller holds _locked()."""
+    global _file_entries, _file_offset, _file_id
+    try:
+        os.makedirs(FEEDBACK_DIR, exist_ok=True)
+        tmp_path = FEEDBACK_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in feedback_list)
+        os.replace(tmp_path, FEEDBACK_FILE)
+        st = os.stat(FEEDBACK_FILE)
+        _file_entries = len(feedback_list)
+        _file_offset, _file_id = st.st_size, (st.st_dev, st.st_ino)
+        return True
+    except Exception as e:
+        logger.error(f"[FEEDBACK] Failed to save feedback: {e}")
+        return False
 
 
-def _save_feedback(feedback_list: List[Dict[str, Any]]) -> bool:
-    """Save feedback to file."""
+def _append_feedback(entry: Dict[str, Any]) -> bool:
+    """Append a single entry to the feedback file. Caller holds _locked() and is caught up with the file."""
+    global _file_entries, _file_offset, _file_id
     try:
         os.makedirs(FEEDBACK_DIR, exist_ok=True)
-        with open(FEEDBACK_FILE, 'w', encoding='utf-8') as f:
-            json.dump(feedback_list, f, ensure_ascii=False, indent=2)
+        with open(FEEDBACK_FILE, 'ab') as f:
+            f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+            f.flush()
+            st = os.fstat(f.fileno())
+        _file_entries += 1
+        _file_offset, _file_id = st.st_size, (st.st_dev, st.st_ino)
         return True
     except Exception as e:
         logger.error(f"[FEEDBACK] Failed to save feedback: {e}")
@@ -65,8 +235,6 @@ def store_feedback(
     Returns:
         True if stored successfully
     """
-    feedback_list = _load_feedback()
-    
     entry = {
         'video_id': video_id,
         'segment_index': segment_index,
@@ -75,24 +243,27 @@ def store_feedback(
     }
     
     if source_text:
-        entry['source_text'] = source_text[:500]  # Limit size
+        entry['source_text'] = _cap_utf8(source_text, MAX_TEXT_BYTES)  # Limit size
     if translated_text:
-        entry['translated_text'] = translated_text[:500]
+        entry['translated_text'] = _cap_utf8(translated_text, MAX_TEXT_BYTES)
     if target_lang:
         entry['target_lang'] = target_lang
     if user_correction:
-        entry['user_correction'] = user_correction[:500]
-    
-    feedback_list.append(entry)
+        entry['user_correction'] = _cap_utf8(user_correction, MAX_TEXT_BYTES)
     
-    # Enforce size limit (remove oldest entries)
-    if len(feedback_list) > MAX_FEEDBACK_ENTRIES:
-        feedback_list = feedback_list[-MAX_FEEDBACK_ENTRIES:]
-    
-    if _save_feedback(feedback_list):
-        logger.info(f"[FEEDBACK] Stored feedback for video={video_id} segment={segment_index} rating={rating}")
-        return True
-    return False
+    with _locked():
+        feedback_list = _load_feedback()
+        if not _append_feedback(entry):
+            return False
+        _remember(entry)
+
+        # Enforce the size limit on disk too, in one rewrite per COMPACT_EVERY trimmed entries.
+        # Safe across workers: the lock is held and feedback_list includes their appends.
+        if _file_entries - len(feedback_list) >= COMPACT_EVERY:
+            _save_feedback(feedback_list)
+
+    logger.info(f"[FEEDBACK] Stored feedback for video={video_id} segment={segment_index} rating={rating}")
+    return True
 
 
 def get_feedback_stats() -> Dict[str, Any]:
@@ -102,19 +273,9 @@ def get_feedback_stats() -> Dict[str, Any]:
     Returns:
         Dict with feedback counts and ratings
     """
-    feedback_list = _load_feedback()
-    
-    if not feedback_list:
-        return {
-            'total': 0,
-            'positive': 0,
-            'negative': 0,
-            'ratio': 0.0
-        }
-    
-    positive = sum(1 for f in feedback_list if f.get('rating', 0) > 0)
-    negative = sum(1 for f in feedback_list if f.get('rating', 0) < 0)
-    total = len(feedback_list)
+    with _locked():
+        total = len(_load_feedback())
+        positive, negative = _positive, _negative
     
     return {
         'total': total,
@@ -131,22 +292,9 @@ def get_problematic_patterns() -> List[Dict[str, Any]]:
     Returns:
         List of patterns that frequently receive negative feedback
     """
-    feedback_list = _load_feedback()
-    
-    # Track negative feedback by target language
-    lang_issues = {}
-    for f in feedback_list:
-        if f.get('rating', 0) < 0:
-            lang = f.get('target_lang', 'unknown')
-            if lang not in lang_issues:
-                lang_issues[lang] = 0
-            lang_issues[lang] += 1
-    
-    patterns = []
-    for lang, count in sorted(lang_issues.items(), key=lambda x: -x[1])[:5]:
-        patterns.append({
-            'target_lang': lang,
-            'negative_count': count
-        })
+    # Negative feedback by target language is tallied as entries are stored
+    with _locked():
+        _load_feedback()
+        top = _negative_by_lang.most_common(5)
     
-    return patterns
+    return [{'target_lang': lang, 'negative_count': count} for lang, count in top]
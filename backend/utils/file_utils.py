@@ -1,8 +1,10 @@
 import os
-import re
+import string
+import functools
 
-# Safe pattern for video IDs used in filesystem paths
-_SAFE_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{1,128}$')
+# Characters allowed in video IDs used in filesystem paths (ASCII alphanumerics, '_' and '-')
+_SAFE_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+_MAX_ID_LENGTH = 128
 
 def get_cache_path(video_id: str, suffix: str = 'subtitles', cache_dir: str = None) -> str:
     """
@@ -20,8 +22,13 @@ def get_cache_path(video_id: str, suffix: str = 'subtitles', cache_dir: str = No
         from backend.config import CACHE_DIR
         cache_dir = CACHE_DIR
 
+    return _build_cache_path(video_id, suffix, cache_dir)
+
+@functools.lru_cache(maxsize=4096)
+def _build_cache_path(video_id: str, suffix: str, cache_dir: str) -> str:
+    """Validated cache path for get_cache_path; memoized since the same paths are requested repeatedly."""
     # Sanitize video_id to prevent path traversal
-    if not video_id or not _SAFE_ID_PATTERN.match(video_id):
+    if not video_id or len(video_id) > _MAX_ID_LENGTH or not _SAFE_ID_CHARS.issuperset(video_id):
         raise ValueError(f"Invalid video_id for cache path: {str(video_id)[:20]}")
 
     path = os.path.join(cache_dir, f"{video_id}_{suffix}.json")
@@ -35,8 +42,11 @@ def validate_audio_file(audio_path: str) -> tuple[bool, str]:
     Check if audio file exists and is not empty.
     Returns: (is_valid, error_message)
     """
-    if not os.path.exists(audio_path):
+    # One stat covers both checks (os.path.exists + getsize would stat twice)
+    try:
+        size = os.stat(audio_path).st_size
+    except OSError:
         return False, "File does not exist"
-    if os.path.getsize(audio_path) == 0:
+    if size == 0:
         return False, "File is empty"
     return True, ""
@@ -64,26 +64,33 @@ MODEL_CONTEXT_SIZES = {
     'command': 4096,
 }
 
-@lru_cache(maxsize=64)
+# Partial-match order: a versioned id like "gpt-4-32k-0613" must hit 'gpt-4-32k' before 'gpt-4'.
+# sorted() is stable, so equal-length keys keep their table order.
+_CONTEXT_KEYS_LONGEST_FIRST = sorted(MODEL_CONTEXT_SIZES, key=len, reverse=True)
+
+
 def get_model_context_size(model_name: str) -> int:
     """
     Get context size for a model, with sensible defaults.
 
-    Results are cached to avoid repeated lookups for the same model.
+    The name is lower-cased before the (cached) lookup so case variants of the
+    same model share one cache entry.
     """
     if not model_name:
         return 8192
+    return _context_size_for(model_name.lower())
 
-    model_lower = model_name.lower()
 
+@lru_cache(maxsize=64)
+def _context_size_for(model_lower: str) -> int:
     # Check exact match first
-    if model_name in MODEL_CONTEXT_SIZES:
-        return MODEL_CONTEXT_SIZES[model_name]
+    if model_lower in MODEL_CONTEXT_SIZES:
+        return MODEL_CONTEXT_SIZES[model_lower]
 
-    # Check partial matches
-    for key, size in MODEL_CONTEXT_SIZES.items():
+    # Check partial matches, most specific (longest) key first
+    for key in _CONTEXT_KEYS_LONGEST_FIRST:
         if key in model_lower:
-            return size
+            return MODEL_CONTEXT_SIZES[key]
 
     # Default for unknown models
     return 8192
@@ -0,0 +1,49 @@
+"""
+Translation Line Cache
+
+In-memory LRU of individual subtitle translations so repeated lines
+("Yeah.", "[Music]", speaker names) are not sent to the LLM again.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from backend.config import TRANSLATION_CACHE_SIZE
+
+# (api_url, model_id, source_lang, target_lang, text)
+CacheKey = Tuple[str, str, str, str, str]
+
+_cache: "OrderedDict[CacheKey, str]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def make_key(api_url: Optional[str], model_id: str, source_lang: str, target_lang: str, text: str) -> CacheKey:
+    """Build the exact-match key for one subtitle line."""
+    return (api_url or '', model_id, source_lang, target_lang, text.strip())
+
+
+def get(key: CacheKey) -> Optional[str]:
+    """Return the cached translation for a key, or None on a miss."""
+    with _lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+
+def put(key: CacheKey, translation: str) -> None:
+    """Store a translation, evicting the least recently used entries past the size limit."""
+    if TRANSLATION_CACHE_SIZE <= 0 or not translation:
+        return
+    with _lock:
+        _cache[key] = translation
+        _cache.move_to_end(key)
+        while len(_cache) > TRANSLATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear() -> None:
+    """Drop every cached translation."""
+    with _lock:
+        _cache.clear()